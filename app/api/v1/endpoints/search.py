@@ -1,15 +1,58 @@
 """Search endpoints for product search functionality."""
 
+import hashlib
 import logging
-from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Annotated, Optional
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Query, Response
+import redis.asyncio as redis
 from app.models.schemas import SearchResponse, ErrorResponse
 from app.core.config import settings
-from app.core.dependencies import get_basalam_service
-from app.services.basalam_service import BasalamService
+from app.core.dependencies import BasalamServiceDep, RedisDep
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# In-process L1 cache of serialized search responses, in front of Redis
+_search_cache: TTLCache = TTLCache(
+    maxsize=settings.SEARCH_CACHE_LOCAL_MAXSIZE,
+    ttl=settings.SEARCH_CACHE_LOCAL_TTL
+)
+
+
+def _search_cache_key(q: str, from_: int, size: int) -> str:
+    """Build the cache key for a search query and page."""
+    normalized = " ".join(q.split())
+    digest = hashlib.blake2b(normalized.encode()).hexdigest()[:16]
+    return f"sr:{digest}:{from_}:{size}"
+
+
+async def _get_cached_search(cache_key: str, redis_client: Optional[redis.Redis]) -> Optional[bytes]:
+    """Return serialized search response bytes from the L1 cache or Redis."""
+    cached = _search_cache.get(cache_key)
+    if cached is None and redis_client is not None:
+        try:
+            cached = await redis_client.get(cache_key)
+        except Exception as e:
+            logger.warning("Redis lookup failed for %s: %s", cache_key, e)
+        if cached is not None:
+            _search_cache[cache_key] = cached
+    return cached
+
+
+async def _store_cached_search(
+    cache_key: str, 
+    payload: bytes, 
+    redis_client: Optional[redis.Redis]
+) -> None:
+    """Store serialized search response bytes in the L1 cache and Redis."""
+    _search_cache[cache_key] = payload
+    if redis_client is not None:
+        try:
+            await redis_client.set(cache_key, payload, ex=settings.SEARCH_CACHE_TTL)
+        except Exception as e:
+            logger.warning("Redis store failed for %s: %s", cache_key, e)
+
 
 @router.get(
     "/products",
@@ -23,15 +66,15 @@ router = APIRouter()
     tags=["Search"]
 )
 async def search_products(
-    q: str = Query(..., description="Search query", min_length=1, max_length=500),
-    from_: int = Query(0, alias="from", description="Pagination offset", ge=0),
-    size: int = Query(
-        settings.DEFAULT_PAGE_SIZE, 
+    q: Annotated[str, Query(description="Search query", min_length=1, max_length=500)],
+    basalam_service: BasalamServiceDep,
+    redis_client: RedisDep,
+    from_: Annotated[int, Query(alias="from", description="Pagination offset", ge=0)] = 0,
+    size: Annotated[int, Query(
         description="Number of results per page", 
         ge=1, 
         le=settings.MAX_PAGE_SIZE
-    ),
-    basalam_service: BasalamService = Depends(get_basalam_service)
+    )] = settings.DEFAULT_PAGE_SIZE
 ):
     """
     Search for products with pagination support.
@@ -52,9 +95,19 @@ async def search_products(
     **Returns:**
     - List of products matching the search query
     - Pagination metadata for infinite scroll implementation
+    
+    Identical searches are served from cache for a short time.
     """
     try:
-        logger.info(f"Searching products: query='{q}', from={from_}, size={size}")
+        logger.info("Searching products: query='%s', from=%s, size=%s", q, from_, size)
+        
+        # Cached bytes were validated when stored, so return them as-is
+        # and skip response_model validation and serialization
+        cache_key = _search_cache_key(q, from_, size)
+        cached = await _get_cached_search(cache_key, redis_client)
+        if cached is not None:
+            logger.info("Search cache hit: query='%s', from=%s, size=%s", q, from_, size)
+            return Response(content=cached, media_type="application/json")
         
         result = await basalam_service.search_products(
             query=q,
@@ -68,13 +121,18 @@ async def search_products(
                 detail="Failed to search products. Please try again later."
             )
         
-        logger.info(f"Search successful: {len(result.products)} products found")
-        return result
+        logger.info("Search successful: %s products found", len(result.products))
+        
+        # Serialize once and return the same bytes that are cached
+        payload = result.model_dump_json().encode()
+        await _store_cached_search(cache_key, payload, redis_client)
+        
+        return Response(content=payload, media_type="application/json")
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in search: {e}")
+        logger.error("Unexpected error in search: %s", e)
         raise HTTPException(
             status_code=500,
             detail="An unexpected error occurred while searching products."
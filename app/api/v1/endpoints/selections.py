@@ -1,19 +1,19 @@
 """Product selection endpoints for managing user's selected products."""
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Response
 from app.models.schemas import (
     SelectProductRequest,
     SelectedProduct,
+    BatchSelectRequest,
+    BatchSelectResponse,
     SelectedProductsResponse,
     RemoveProductRequest,
     MessageResponse,
     ErrorResponse,
     CartConfirmationResponse
 )
-from app.core.dependencies import get_selection_service
-from app.services.product_selection_service import ProductSelectionService
-from app.services.similar_products_service import SimilarProductsService
+from app.core.dependencies import SelectionServiceDep, SimilarProductsServiceDep
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -32,7 +32,7 @@ router = APIRouter()
 )
 async def select_product(
     request: SelectProductRequest,
-    selection_service: ProductSelectionService = Depends(get_selection_service)
+    selection_service: SelectionServiceDep
 ):
     """
     Add a product to the user's selection.
@@ -51,21 +51,65 @@ async def select_product(
     - Selected product information with selection timestamp
     """
     try:
-        logger.info(f"Selecting product: {request.product_id}")
+        logger.info("Selecting product: %s", request.product_id)
         
         result = selection_service.select_product(request)
         
-        logger.info(f"Product selected successfully: {request.product_id}")
+        logger.info("Product selected successfully: %s", request.product_id)
         return result
         
     except Exception as e:
-        logger.error(f"Error selecting product {request.product_id}: {e}")
+        logger.error("Error selecting product %s: %s", request.product_id, e)
         raise HTTPException(
             status_code=500,
             detail="Failed to select product. Please try again."
         )
 
 
+@router.post(
+    "/products/batch",
+    response_model=BatchSelectResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
+    summary="Select multiple products",
+    description="Add several products to the user's selection list in a single request.",
+    tags=["Product Selection"]
+)
+async def select_products_batch(
+    request: BatchSelectRequest,
+    selection_service: SelectionServiceDep
+):
+    """
+    Add several products to the user's selection in one call.
+    
+    Each item follows the same rules as `POST /products`. Items that
+    fail are reported in `errors` without affecting the others.
+    
+    **Request body:**
+    - **items**: List of product selections (same fields as `POST /products`)
+    
+    **Returns:**
+    - **results**: Selected product information for each successful item
+    - **errors**: Index, product ID and reason for each failed item
+    """
+    try:
+        logger.info("Selecting %s products in batch", len(request.items))
+        
+        results, errors = selection_service.select_products(request.items)
+        
+        logger.info("Batch selection completed: %s selected, %s failed", len(results), len(errors))
+        return BatchSelectResponse(results=results, errors=errors)
+        
+    except Exception as e:
+        logger.error("Error selecting products in batch: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to select products. Please try again."
+        )
+
+
 @router.get(
     "/products",
     response_model=SelectedProductsResponse,
@@ -77,7 +121,7 @@ async def select_product(
     tags=["Product Selection"]
 )
 async def get_selected_products(
-    selection_service: ProductSelectionService = Depends(get_selection_service)
+    selection_service: SelectionServiceDep
 ):
     """
     Get all selected products.
@@ -94,11 +138,12 @@ async def get_selected_products(
         
         result = selection_service.get_selected_products()
         
-        logger.info(f"Retrieved {result.total_count} selected products")
-        return result
+        logger.info("Retrieved %s selected products", result.total_count)
+        # Serialize directly; skips response_model revalidation and jsonable_encoder
+        return Response(content=result.model_dump_json(), media_type="application/json")
         
     except Exception as e:
-        logger.error(f"Error retrieving selected products: {e}")
+        logger.error("Error retrieving selected products: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to retrieve selected products. Please try again."
@@ -118,7 +163,7 @@ async def get_selected_products(
 )
 async def remove_selected_product(
     product_id: int,
-    selection_service: ProductSelectionService = Depends(get_selection_service)
+    selection_service: SelectionServiceDep
 ):
     """
     Remove a product from the selection.
@@ -131,7 +176,7 @@ async def remove_selected_product(
     - Error if product was not found in selection
     """
     try:
-        logger.info(f"Removing product from selection: {product_id}")
+        logger.info("Removing product from selection: %s", product_id)
         
         success = selection_service.remove_product(product_id)
         
@@ -141,7 +186,7 @@ async def remove_selected_product(
                 detail=f"Product with ID {product_id} not found in selection."
             )
         
-        logger.info(f"Product removed successfully: {product_id}")
+        logger.info("Product removed successfully: %s", product_id)
         return MessageResponse(
             message=f"Product {product_id} removed from selection successfully."
         )
@@ -149,7 +194,7 @@ async def remove_selected_product(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error removing product {product_id}: {e}")
+        logger.error("Error removing product %s: %s", product_id, e)
         raise HTTPException(
             status_code=500,
             detail="Failed to remove product from selection. Please try again."
@@ -167,7 +212,7 @@ async def remove_selected_product(
     tags=["Product Selection"]
 )
 async def clear_selected_products(
-    selection_service: ProductSelectionService = Depends(get_selection_service)
+    selection_service: SelectionServiceDep
 ):
     """
     Clear all selected products.
@@ -182,13 +227,13 @@ async def clear_selected_products(
         
         count = selection_service.clear_selections()
         
-        logger.info(f"Cleared {count} selected products")
+        logger.info("Cleared %s selected products", count)
         return MessageResponse(
             message=f"Successfully cleared {count} selected products."
         )
         
     except Exception as e:
-        logger.error(f"Error clearing selected products: {e}")
+        logger.error("Error clearing selected products: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to clear selected products. Please try again."
@@ -207,7 +252,8 @@ async def clear_selected_products(
     tags=["Product Selection"]
 )
 async def confirm_shopping_cart(
-    selection_service: ProductSelectionService = Depends(get_selection_service)
+    selection_service: SelectionServiceDep,
+    similar_products_service: SimilarProductsServiceDep
 ):
     """
     Confirm the shopping cart and find vendor overlaps.
@@ -227,29 +273,30 @@ async def confirm_shopping_cart(
     try:
         logger.info("Starting shopping cart confirmation process")
         
-        # Get all selected products
-        selections = selection_service.get_selected_products()
-        
-        if not selections.products:
+        # Fail fast before materializing the selection list
+        if selection_service.is_empty():
             raise HTTPException(
                 status_code=400,
                 detail="No products selected. Please select some products first."
             )
         
-        logger.info(f"Processing cart confirmation for {selections.total_count} selected products")
+        # Get all selected products
+        selections = selection_service.get_selected_products()
         
-        # Create similar products service and analyze vendor overlaps
-        similar_products_service = SimilarProductsService()
+        logger.info("Processing cart confirmation for %s selected products", selections.total_count)
+        
+        # Analyze vendor overlaps
         result = await similar_products_service.find_vendor_overlaps(selections.products)
         
-        logger.info(f"Cart confirmation completed: found {len(result.vendors_with_multiple_matches)} vendors with multiple matches")
+        logger.info("Cart confirmation completed: found %s vendors with multiple matches", len(result.vendors_with_multiple_matches))
         
-        return result
+        # Serialize directly; skips response_model revalidation and jsonable_encoder
+        return Response(content=result.model_dump_json(), media_type="application/json")
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error during cart confirmation: {e}")
+        logger.error("Error during cart confirmation: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to process cart confirmation. Please try again."
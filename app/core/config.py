@@ -19,12 +19,27 @@ class Settings(BaseSettings):
     # External APIs
     BASALAM_SEARCH_URL: str = "https://search.basalam.com/ai-engine/api/v2.0/product/search"
     
+    # Search response caching (Redis is optional; in-process cache is always on)
+    REDIS_URL: Optional[str] = None
+    SEARCH_CACHE_TTL: int = 120
+    SEARCH_CACHE_LOCAL_TTL: int = 30
+    SEARCH_CACHE_LOCAL_MAXSIZE: int = 1024
+    MLT_CACHE_TTL: int = 1800  # Redis TTL for raw MLT pages
+    BOT_SEARCH_CACHE_TTL: int = 3600  # Redis TTL for Telegram bot term searches
+    
+    # Outbound request bounds, process-wide, to stay under Basalam rate limits
+    MLT_MAX_CONCURRENT_REQUESTS: int = 16
+    MLT_MAX_RETRIES: int = 2  # Retries on HTTP 429 with exponential backoff
+    SEARCH_MAX_CONCURRENT_REQUESTS: int = 8  # Telegram bot term searches
+    
     # Pagination defaults
     DEFAULT_PAGE_SIZE: int = 12
     MAX_PAGE_SIZE: int = 50
     
-    # CORS
-    ALLOWED_ORIGINS: list[str] = ["*"]  # Configure properly for production
+    # CORS - explicit origins, since "*" is invalid together with credentials.
+    # Override per environment, e.g. ALLOWED_ORIGINS='["https://salamyar.ir"]'
+    ALLOWED_ORIGINS: list[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
+    CORS_MAX_AGE: int = 86400  # Seconds browsers may cache preflight responses
     
     # Legacy environment variables (from old Telegram bot setup)
     BOT_TOKEN: Optional[str] = None
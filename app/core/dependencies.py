@@ -1,15 +1,23 @@
 """Dependency injection for services."""
 
 from functools import lru_cache
+from typing import Annotated, Optional
+import redis.asyncio as redis
+from fastapi import Depends, Request
+from app.core.redis import get_redis
 from app.services.basalam_service import BasalamService
 from app.services.product_selection_service import ProductSelectionService
 from app.services.similar_products_service import SimilarProductsService
 
 
-@lru_cache()
-def get_basalam_service() -> BasalamService:
-    """Get singleton BasalamService instance."""
-    return BasalamService()
+async def get_basalam_service(request: Request) -> BasalamService:
+    """Get the application-wide BasalamService created in the app lifespan."""
+    return request.app.state.basalam_service
+
+
+async def get_similar_products_service(request: Request) -> SimilarProductsService:
+    """Get the application-wide SimilarProductsService created in the app lifespan."""
+    return request.app.state.similar_products_service
 
 
 @lru_cache()
@@ -18,7 +26,17 @@ def get_selection_service() -> ProductSelectionService:
     return ProductSelectionService()
 
 
-@lru_cache()
-def get_similar_products_service() -> SimilarProductsService:
-    """Get singleton SimilarProductsService instance."""
-    return SimilarProductsService()
+# FastAPI runs sync dependencies in a threadpool, so endpoints resolve the
+# cached singletons through these async wrappers to stay on the event loop.
+async def _selection_service() -> ProductSelectionService:
+    return get_selection_service()
+
+
+async def _redis() -> Optional[redis.Redis]:
+    return get_redis()
+
+
+BasalamServiceDep = Annotated[BasalamService, Depends(get_basalam_service)]
+SelectionServiceDep = Annotated[ProductSelectionService, Depends(_selection_service)]
+SimilarProductsServiceDep = Annotated[SimilarProductsService, Depends(get_similar_products_service)]
+RedisDep = Annotated[Optional[redis.Redis], Depends(_redis)]
@@ -0,0 +1,18 @@
+"""Shared Redis client factory.
+
+Kept free of FastAPI and service imports so the Telegram bot modules can use
+it without pulling in the API's dependency-injection layer.
+"""
+
+from functools import lru_cache
+from typing import Optional
+import redis.asyncio as redis
+from app.core.config import settings
+
+
+@lru_cache()
+def get_redis() -> Optional[redis.Redis]:
+    """Get singleton Redis client, or None if REDIS_URL is not configured."""
+    if not settings.REDIS_URL:
+        return None
+    return redis.from_url(settings.REDIS_URL)
@@ -3,12 +3,23 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import hashlib
+import logging
 import os
-from typing import List
-import google.generativeai as genai
+import unicodedata
+from typing import Any, List, Optional
+from cachetools import LRUCache
+import orjson
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+
+# Extractions are deterministic for a fixed prompt/model, so cache them for a day
+EXTRACTION_CACHE_TTL = 86400
+_extraction_cache: LRUCache = LRUCache(maxsize=512)
 
 # Prompt template for extracting product names
 EXTRACTION_PROMPT = """You are a versatile and intelligent extraction assistant for an e-commerce platform. Analyze Persian user messages with extreme precision and extract accurate product names. Your process must include: 1. Correcting all spelling errors and Farsi-glish. 2. Identifying associated brands and combining them with the product name. 3. Ignoring all extra words and conversational phrases. Your final output should be a pure and precise list of complete product names, ready for a database search.
@@ -21,22 +32,81 @@ Return the response in JSON format with the following structure:
 }}
 Message: {message}"""
 
-def extract_products(message: str) -> tuple[list[str], str]:
+# The Gemini SDK is heavy to import, so it is loaded on first use
+_initialized = False
+_model: Optional[Any] = None
+
+# JSON mode makes the model return bare JSON, with no Markdown fences to strip
+_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+
+def _lazy_init() -> None:
+    """Import and configure the Gemini SDK and build the model once."""
+    global _initialized, _model
+    if _initialized:
+        return
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    _model = genai.GenerativeModel(
+        'models/gemini-2.5-flash',
+        generation_config=_GENERATION_CONFIG
+    )
+    _initialized = True
+
+
+async def extract_products(message: str) -> tuple[list[str], str]:
     """Extract product names from message using Google Gemini AI. Returns (product_list, raw_output)."""
-    model = genai.GenerativeModel('models/gemini-2.5-flash')
+    _lazy_init()
     prompt = EXTRACTION_PROMPT.format(message=message)
-    response = model.generate_content(prompt)
+    response = await _model.generate_content_async(prompt)
     raw_output = response.text.strip()
     # Try to safely parse the response as JSON
-    import json
     try:
-        # Clean the raw output by removing Markdown-like formatting
-        cleaned_output = raw_output.strip('```json').strip()
-        data = json.loads(cleaned_output)
+        data = orjson.loads(raw_output)
         if isinstance(data, dict) and "products" in data:
             products = data["products"]
             return [str(p).strip() for p in products if isinstance(p, str)], raw_output
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         # Debugging: Log the error if JSON parsing fails
-        print(f"JSONDecodeError: {e}")
+        logger.warning("JSONDecodeError: %s", e)
     return [], raw_output
+
+
+def _extraction_cache_key(message: str) -> str:
+    """Build the cache key for a normalized message."""
+    normalized = " ".join(unicodedata.normalize("NFKC", message).lower().split())
+    return f"gx:{hashlib.blake2b(normalized.encode()).hexdigest()}"
+
+
+async def extract_products_cached(message: str) -> tuple[list[str], str]:
+    """Cached variant of `extract_products`."""
+    key = _extraction_cache_key(message)
+    cached = _extraction_cache.get(key)
+    if cached is not None:
+        return cached
+
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            stored = await redis_client.get(key)
+            if stored is not None:
+                data = orjson.loads(stored)
+                result = (data["products"], data["raw"])
+                _extraction_cache[key] = result
+                return result
+        except Exception as e:
+            logger.warning("Redis lookup failed for %s: %s", key, e)
+
+    result = await extract_products(message)
+    # An empty list means Gemini's reply could not be used, so leave it uncached
+    # and let the next identical message retry
+    if not result[0]:
+        return result
+    _extraction_cache[key] = result
+    if redis_client is not None:
+        try:
+            payload = orjson.dumps({"products": result[0], "raw": result[1]})
+            await redis_client.set(key, payload, ex=EXTRACTION_CACHE_TTL)
+        except Exception as e:
+            logger.warning("Redis store failed for %s: %s", key, e)
+    return result
@@ -1,12 +1,19 @@
 """FastAPI application entry point."""
 
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import httpx
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.core.redis import get_redis
+from app.services.basalam_service import BasalamService
+from app.services.similar_products_service import SimilarProductsService
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +25,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared HTTP resources on startup and close them on shutdown."""
+    # HTTP/2 lets concurrent searches and MLT pages multiplex over one connection to Basalam
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=200)
+    )
+    app.state.basalam_service = BasalamService(app.state.http)
+    app.state.similar_products_service = SimilarProductsService(app.state.http, get_redis())
+    yield
+    await app.state.basalam_service.aclose()
+    await app.state.similar_products_service.aclose()
+    await app.state.http.aclose()
+    if (redis_client := get_redis()) is not None:
+        await redis_client.aclose()
+
+
 # Create FastAPI application
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -26,6 +52,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -33,29 +60,38 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=settings.CORS_MAX_AGE,
 )
 
+# Compress larger JSON responses (e.g. search result pages)
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+# Health responses never change, so serialize them once at startup
+_ROOT_BODY = orjson.dumps({
+    "status": "ok", 
+    "message": "Salamyar Product Search API is running",
+    "version": settings.VERSION
+})
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": settings.PROJECT_NAME,
+    "version": settings.VERSION
+})
+
+
 @app.get("/")
-async def root() -> dict[str, str]:
+async def root() -> Response:
     """Health check endpoint."""
-    return {
-        "status": "ok", 
-        "message": "Salamyar Product Search API is running",
-        "version": settings.VERSION
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
-async def health_check() -> dict[str, str]:
+async def health_check() -> Response:
     """Detailed health check endpoint."""
-    return {
-        "status": "healthy",
-        "service": settings.PROJECT_NAME,
-        "version": settings.VERSION
-    }
+    return Response(content=_HEALTH_BODY, media_type="application/json")
@@ -1,29 +1,34 @@
 """Pydantic models for Basalam API integration."""
 
-from typing import Optional, List, Any, Dict
-from pydantic import BaseModel, Field
+from typing import Optional, List, Any
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class BasalamPhotoModel(BaseModel):
+class BasalamBaseModel(BaseModel):
+    """Base model for read-only Basalam API payloads."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+
+class BasalamPhotoModel(BasalamBaseModel):
     """Photo model from Basalam API response."""
     MEDIUM: Optional[str] = None
     SMALL: Optional[str] = None
 
 
-class BasalamStatusModel(BaseModel):
+class BasalamStatusModel(BasalamBaseModel):
     """Status model from Basalam API response."""
     id: Optional[int] = None
     title: Optional[str] = None
 
 
-class BasalamOwnerModel(BaseModel):
+class BasalamOwnerModel(BasalamBaseModel):
     """Owner model from Basalam API response."""
     city: Optional[str] = None
     id: Optional[int] = None
     hashId: Optional[str] = None
 
 
-class BasalamVendorModel(BaseModel):
+class BasalamVendorModel(BasalamBaseModel):
     """Vendor model from Basalam API response."""
     statusId: Optional[int] = None
     name: Optional[str] = None
@@ -39,14 +44,14 @@ class BasalamVendorModel(BaseModel):
     owner: Optional[BasalamOwnerModel] = None
 
 
-class BasalamRatingModel(BaseModel):
+class BasalamRatingModel(BasalamBaseModel):
     """Rating model from Basalam API response."""
     average: Optional[float] = None
     count: Optional[int] = None
     signals: Optional[int] = None
 
 
-class BasalamProductModel(BaseModel):
+class BasalamProductModel(BasalamBaseModel):
     """Product model from Basalam API response."""
     _score: Optional[float] = None
     sales_count_week: Optional[int] = None
@@ -64,11 +69,11 @@ class BasalamProductModel(BaseModel):
     rating: Optional[BasalamRatingModel] = None
     status: Optional[BasalamStatusModel] = None
     stock: Optional[int] = None
-    video: Optional[Dict[str, Any]] = None
+    video: Optional[Any] = None
     weight: Optional[int] = None
     categoryId: Optional[int] = None
     vendor: Optional[BasalamVendorModel] = None
-    ads: Optional[Dict[str, Any]] = None
+    ads: Optional[Any] = None
     isFreeShipping: Optional[bool] = None
     canAddToCart: Optional[bool] = None
     IsAvailable: Optional[bool] = None
@@ -76,7 +81,7 @@ class BasalamProductModel(BaseModel):
     mainAttribute: Optional[str] = None
     has_mlt: Optional[bool] = None
     has_video: Optional[bool] = None
-    currentPromotion: Optional[Dict[str, Any]] = None
+    currentPromotion: Optional[Any] = None
     impression: Optional[Any] = None
     clickCount: Optional[Any] = None
     fastBookMark: Optional[bool] = None
@@ -87,36 +92,36 @@ class BasalamProductModel(BaseModel):
     is_wholesale: Optional[bool] = None
     salampay_tag: Optional[bool] = None
     indexedAt: Optional[str] = None
-    tags: Optional[List[Dict[str, Any]]] = None
+    tags: Optional[List[Any]] = None
 
 
-class BasalamMetaModel(BaseModel):
+class BasalamMetaModel(BasalamBaseModel):
     """Meta information from Basalam API response."""
     took: int
     count: int
-    experiments: Dict[str, Any]
-    seo: Dict[str, Any]
+    experiments: Any
+    seo: Any
 
 
-class BasalamSearchResponse(BaseModel):
+class BasalamSearchResponse(BasalamBaseModel):
     """Complete Basalam search API response model."""
     correction: Optional[str] = None
     didYouMean: Optional[str] = None
     dynamicFacets: List[Any]
     suggestions: List[Any]
-    metadata: Dict[str, Any]
+    metadata: Any
     meta: BasalamMetaModel
-    selectedFilters: Dict[str, Any]
+    selectedFilters: Any
     selectedFacets: List[Any]
     selectedCategoryList: Optional[str] = None
-    facets: Dict[str, Any]
+    facets: Any
     products: List[BasalamProductModel]
-    inputChanges: Dict[str, Any]
+    inputChanges: Any
     promoted_nodes: List[Any]
-    similar_vendors: Dict[str, Any]
+    similar_vendors: Any
     breadcrumb: List[Any]
     subcategories: List[Any]
-    details: Dict[str, Any]
+    details: Any
     debug: Optional[Any] = None
     sorts: List[Any]
     show_explore: bool
@@ -0,0 +1,71 @@
+"""msgspec structs for decoding Basalam search and MLT responses.
+
+Only the fields mapped into `SearchProduct`/`SimilarProduct` are declared; everything
+else in the payload is skipped while decoding. Structs are slotted by
+default; `gc=False` also keeps these acyclic, short-lived instances out
+of the cyclic garbage collector.
+"""
+
+from typing import List, Optional
+import msgspec
+
+
+class BasalamPhotoFast(msgspec.Struct, frozen=True, gc=False):
+    """Photo URLs of a Basalam product."""
+    MEDIUM: Optional[str] = None
+    SMALL: Optional[str] = None
+
+
+class BasalamVendorFast(msgspec.Struct, frozen=True, gc=False):
+    """Vendor of a Basalam product."""
+    id: Optional[int] = None
+    name: Optional[str] = ""
+
+
+class BasalamStatusFast(msgspec.Struct, frozen=True, gc=False):
+    """Status of a Basalam product."""
+    id: Optional[int] = 0
+    title: Optional[str] = ""
+
+
+class BasalamRatingFast(msgspec.Struct, frozen=True, gc=False):
+    """Rating of a Basalam product."""
+    average: Optional[float] = 0.0
+    count: Optional[int] = 0
+
+
+class BasalamProductFast(msgspec.Struct, frozen=True, gc=False):
+    """Product fields used to build a `SearchProduct` or `SimilarProduct`."""
+    id: Optional[int] = None
+    name: Optional[str] = ""
+    price: Optional[float] = 0.0
+    photo: Optional[BasalamPhotoFast] = None
+    vendor: Optional[BasalamVendorFast] = None
+    status: Optional[BasalamStatusFast] = None
+    categoryTitle: Optional[str] = ""
+    IsAvailable: Optional[bool] = False
+    isFreeShipping: Optional[bool] = False
+    rating: Optional[BasalamRatingFast] = None
+    stock: Optional[int] = 0
+
+
+class BasalamMetaFast(msgspec.Struct, frozen=True, gc=False):
+    """Search metadata from Basalam."""
+    count: int = 0
+
+
+class BasalamSearchResponseFast(msgspec.Struct, frozen=True, gc=False):
+    """Subset of the Basalam search response used by `BasalamService`."""
+    products: List[BasalamProductFast] = []
+    meta: BasalamMetaFast = msgspec.field(default_factory=BasalamMetaFast)
+
+
+class BasalamSearchResponseRaw(msgspec.Struct, frozen=True, gc=False):
+    """Search response with undecoded products, so each can be decoded on its own."""
+    products: List[msgspec.Raw] = []
+    meta: BasalamMetaFast = msgspec.field(default_factory=BasalamMetaFast)
+
+
+class BasalamMltResponseFast(msgspec.Struct, frozen=True, gc=False):
+    """Subset of the MLT (similar products) response used by `SimilarProductsService`."""
+    products: List[BasalamProductFast] = []
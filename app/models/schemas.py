@@ -82,6 +82,24 @@ class SelectedProductsResponse(BaseModel):
     total_count: int
 
 
+class BatchSelectRequest(BaseModel):
+    """Request model for selecting several products in one call."""
+    items: List[SelectProductRequest] = Field(..., min_length=1)
+
+
+class BatchSelectError(BaseModel):
+    """A product from a batch selection that could not be selected."""
+    index: int  # Position of the item in the request
+    product_id: int
+    error: str
+
+
+class BatchSelectResponse(BaseModel):
+    """Response model for batch product selection."""
+    results: List[SelectedProduct]
+    errors: List[BatchSelectError]
+
+
 class RemoveProductRequest(BaseModel):
     """Request model for removing a selected product."""
     product_id: int
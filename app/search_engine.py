@@ -1,22 +1,78 @@
 """Basalam search integration and vendor-overlap logic."""
 
-from typing import Dict, List, Any, DefaultDict, Set
-from collections import defaultdict
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Set
+from collections import Counter
 import httpx
+import orjson
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.core.redis import get_redis
 
 
 BASALAM_SEARCH_URL = "https://search.basalam.com/ai-engine/api/v2.0/product/search"
 
+# Bounds in-flight term searches across all bot messages
+_request_semaphore = asyncio.Semaphore(settings.SEARCH_MAX_CONCURRENT_REQUESTS)
+
+# Successful search payloads keyed by normalized query term; raw bodies are
+# also kept in Redis (when configured) so they survive restarts and are
+# shared between processes
+SEARCH_CACHE_TTL = 300
+_search_cache: TTLCache = TTLCache(maxsize=2048, ttl=SEARCH_CACHE_TTL)
+
+# In-flight fetches by normalized term, so concurrent misses share one request
+_inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
 
-def _fetch_search_results_for_product(query: str) -> Dict[str, Any]:
+async def _fetch_search_results_for_product(
+    query: str, client: httpx.AsyncClient
+) -> Dict[str, Any]:
     """Call Basalam search API for a single product keyword and return JSON.
 
-    Falls back to empty result on any error.
+    Requests go through `client`, the caller's shared (pooled) client.
+
+    Successful payloads are cached per normalized term, in process and in
+    Redis; falls back to empty (uncached) result on any error. Concurrent
+    misses for the same term wait on a single fetch.
     """
+    cache_key = str(query).strip().lower()
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    future = _inflight.get(cache_key)
+    if future is None:
+        future = asyncio.ensure_future(_fetch_and_cache(query, cache_key, client))
+        _inflight[cache_key] = future
+        future.add_done_callback(lambda _: _inflight.pop(cache_key, None))
+    # Shield so one cancelled caller doesn't cancel the fetch for the others
+    return await asyncio.shield(future)
+
+
+async def _fetch_and_cache(
+    query: str, cache_key: str, client: httpx.AsyncClient
+) -> Dict[str, Any]:
+    """Look up `query` in Redis, else fetch it from Basalam, and fill the caches."""
+    redis_client = get_redis()
+    redis_key = f"bs:{hashlib.blake2b(cache_key.encode()).hexdigest()[:16]}"
+    if redis_client is not None:
+        try:
+            stored = await redis_client.get(redis_key)
+            if stored is not None:
+                payload = orjson.loads(stored)
+                _search_cache[cache_key] = payload
+                return payload
+        except Exception:
+            pass
+
     try:
-        with httpx.Client(timeout=15) as client:
-            # Official GET pattern per spec: from=0, q, size=24, adsImpressionDisable=true, grouped=false
-            response = client.get(
+        # Official GET pattern per spec: from=0, q, size=24, adsImpressionDisable=true, grouped=false
+        async with _request_semaphore:
+            response = await client.get(
                 BASALAM_SEARCH_URL,
                 params={
                     "from": 0,
@@ -26,38 +82,60 @@ def _fetch_search_results_for_product(query: str) -> Dict[str, Any]:
                 },
                 headers={"Accept": "application/json"},
             )
-            if response.status_code == 200:
-                return response.json()
+        if response.status_code == 200:
+            payload = orjson.loads(response.content)
+            _search_cache[cache_key] = payload
+        else:
+            return {}
     except Exception:
-        pass
-    return {}
+        return {}
+
+    if redis_client is not None:
+        try:
+            await redis_client.set(
+                redis_key, response.content, ex=settings.BOT_SEARCH_CACHE_TTL
+            )
+        except Exception:
+            pass
+    return payload
+
+
+def clear_cache() -> None:
+    """Drop all in-process cached search payloads (Redis entries expire on their own)."""
+    _search_cache.clear()
+
 
+@dataclass(slots=True)
+class SearchHits:
+    """Minimal product fields from one search, stored column-wise."""
 
-def _extract_minimal_products(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    product_ids: List[int] = field(default_factory=list)
+    product_names: List[Optional[str]] = field(default_factory=list)
+    vendor_ids: List[int] = field(default_factory=list)
+    vendor_names: List[Optional[str]] = field(default_factory=list)
+
+
+def _extract_minimal_products(payload: Dict[str, Any]) -> SearchHits:
     """Extract minimal product fields from Basalam payload."""
-    products: List[Dict[str, Any]] = []
+    hits = SearchHits()
     for item in payload.get("products", []) or []:
         vendor = item.get("vendor") or {}
         product_id = item.get("id")
-        product_name = item.get("name")
         vendor_id = vendor.get("id")
-        vendor_name = vendor.get("name")
         if product_id is None or vendor_id is None:
             continue
-        products.append(
-            {
-                "product_id": product_id,
-                "product_name": product_name,
-                "vendor_id": vendor_id,
-                "vendor_name": vendor_name,
-            }
-        )
-    return products
+        hits.product_ids.append(product_id)
+        hits.product_names.append(item.get("name"))
+        hits.vendor_ids.append(vendor_id)
+        hits.vendor_names.append(vendor.get("name"))
+    return hits
 
 
-def search_vendor_overlap(products: List[str]) -> Dict[str, Any]:
+async def search_vendor_overlap(
+    products: List[str], client: httpx.AsyncClient
+) -> Dict[str, Any]:
     """For each product term, search Basalam, then compute vendors that appear across
-    at least two distinct product searches.
+    at least two distinct product searches. Searches go through `client`.
 
     Returns a dict with:
       - matches: flat list of minimal items with keys:
@@ -65,54 +143,69 @@ def search_vendor_overlap(products: List[str]) -> Dict[str, Any]:
         (only for overlapping vendors)
       - vendors: list of {vendor_id, vendor_name, matched_products} indicating how many
         of the user's requested products each vendor covers
-    """
-    if not products:
-        return {"matches": [], "vendors": []}
+      - terms: the de-duplicated terms that were searched, in request order; these
+        are the values used as query_term
 
-    per_query_results: List[List[Dict[str, Any]]] = []
+    Terms are stripped and de-duplicated case-insensitively first (keeping the first
+    spelling), so repeated terms cost no extra requests and don't count as overlaps.
+    """
+    unique_terms: Dict[str, str] = {}
     for term in products:
-        payload = _fetch_search_results_for_product(term)
-        minimal = _extract_minimal_products(payload)
-        # annotate each item with its originating query term for downstream grouping
-        for item in minimal:
-            item["query_term"] = term
-        per_query_results.append(minimal)
-
-    # Track vendor presence across distinct query indices
-    vendor_to_query_indices: DefaultDict[int, Set[int]] = defaultdict(set)
-    vendor_names: Dict[int, str] = {}
-    for query_index, items in enumerate(per_query_results):
-        for item in items:
-            vendor_id = item["vendor_id"]
-            vendor_to_query_indices[vendor_id].add(query_index)
-            if vendor_id not in vendor_names and item.get("vendor_name"):
-                vendor_names[vendor_id] = item["vendor_name"]
+        term = str(term).strip()
+        if term:
+            unique_terms.setdefault(term.lower(), term)
+    terms = list(unique_terms.values())
+
+    if not terms:
+        return {"matches": [], "vendors": [], "terms": terms}
+
+    # Search all terms concurrently; failed searches come back as empty payloads
+    payloads = await asyncio.gather(
+        *(_fetch_search_results_for_product(term, client) for term in terms)
+    )
+
+    per_query_hits = [_extract_minimal_products(payload) for payload in payloads]
+
+    # Count the distinct queries each vendor appears in; set() and Counter.update
+    # both run in C, so no per-hit Python loop is needed
+    vendor_query_counts: Counter = Counter()
+    for hits in per_query_hits:
+        vendor_query_counts.update(set(hits.vendor_ids))
 
     # Vendors that appear in at least two different product queries
     overlapping_vendors: Set[int] = {
-        vendor_id for vendor_id, idxs in vendor_to_query_indices.items() if len(idxs) >= 2
+        vendor_id for vendor_id, count in vendor_query_counts.items() if count >= 2
     }
 
     if not overlapping_vendors:
-        return {"matches": [], "vendors": []}
-
-    # Flatten all items but keep only those belonging to overlapping vendors
-    output_items: List[Dict[str, Any]] = []
-    for items in per_query_results:
-        for item in items:
-            if item["vendor_id"] in overlapping_vendors:
-                output_items.append(item)
+        return {"matches": [], "vendors": [], "terms": terms}
 
-    # De-duplicate identical product entries (same product_id)
+    # Emit items of overlapping vendors, annotated with their originating query term,
+    # de-duplicating identical product entries (same product_id) by first occurrence
+    # Also record the first non-empty name seen for each overlapping vendor
     seen_product_ids: Set[int] = set()
     deduped_items: List[Dict[str, Any]] = []
-    for item in output_items:
-        pid = item["product_id"]
-        if pid in seen_product_ids:
-            # Keep the first occurrence; it already contains a query_term
-            continue
-        seen_product_ids.add(pid)
-        deduped_items.append(item)
+    vendor_names: Dict[int, str] = {}
+    for term, hits in zip(terms, per_query_hits):
+        for product_id, product_name, vendor_id, vendor_name in zip(
+            hits.product_ids, hits.product_names, hits.vendor_ids, hits.vendor_names
+        ):
+            if vendor_id not in overlapping_vendors:
+                continue
+            if vendor_id not in vendor_names and vendor_name:
+                vendor_names[vendor_id] = vendor_name
+            if product_id in seen_product_ids:
+                continue
+            seen_product_ids.add(product_id)
+            deduped_items.append(
+                {
+                    "product_id": product_id,
+                    "product_name": product_name,
+                    "vendor_id": vendor_id,
+                    "vendor_name": vendor_name,
+                    "query_term": term,
+                }
+            )
 
     # Build vendor summary with matched product count (count of distinct queries matched)
     vendors_summary: List[Dict[str, Any]] = []
@@ -121,11 +214,11 @@ def search_vendor_overlap(products: List[str]) -> Dict[str, Any]:
             {
                 "vendor_id": vendor_id,
                 "vendor_name": vendor_names.get(vendor_id, ""),
-                "matched_products": len(vendor_to_query_indices[vendor_id]),
+                "matched_products": vendor_query_counts[vendor_id],
             }
         )
 
     # Sort vendors by matched count desc, then by name
     vendors_summary.sort(key=lambda v: (-v["matched_products"], v.get("vendor_name") or ""))
 
-    return {"matches": deduped_items, "vendors": vendors_summary}
+    return {"matches": deduped_items, "vendors": vendors_summary, "terms": terms}
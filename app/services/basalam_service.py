@@ -1,20 +1,57 @@
 """Service for integrating with Basalam search API."""
 
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional
 import httpx
+import msgspec
 from app.core.config import settings
+from app.models.basalam_fast import (
+    BasalamSearchResponseFast,
+    BasalamSearchResponseRaw,
+    BasalamProductFast,
+    BasalamPhotoFast,
+    BasalamStatusFast,
+    BasalamRatingFast
+)
 from app.models.schemas import SearchProduct, SearchResponse, SearchMeta, ProductImage
 
 logger = logging.getLogger(__name__)
 
+# Decodes only the fields we map, skipping the rest of Basalam's payload
+_search_decoder = msgspec.json.Decoder(BasalamSearchResponseFast, strict=False)
+
+# Fallback when one product has unexpected types: products are decoded one by one
+_search_raw_decoder = msgspec.json.Decoder(BasalamSearchResponseRaw, strict=False)
+_product_decoder = msgspec.json.Decoder(BasalamProductFast, strict=False)
+
+# Stand-ins for nested objects missing from a product
+_EMPTY_PHOTO = BasalamPhotoFast()
+_EMPTY_STATUS = BasalamStatusFast()
+_EMPTY_RATING = BasalamRatingFast()
+
+# Constant parts of every search request
+_SEARCH_HEADERS = {"Accept": "application/json"}
+_SEARCH_PARAMS = {"adsImpressionDisable": True}
+
 
 class BasalamService:
     """Service for interacting with Basalam search API."""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = settings.BASALAM_SEARCH_URL
         self.timeout = 15.0
+        # Pooled client, normally shared application-wide via the lifespan
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        )
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client if this service created it."""
+        if self._owns_client:
+            await self._client.aclose()
     
     async def search_products(
         self, 
@@ -34,113 +71,141 @@ class BasalamService:
             SearchResponse object or None if error
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                params = {
-                    "from": from_offset,
-                    "q": query,
-                    "size": size,
-                    "adsImpressionDisable": True,
-                }
-                
-                response = await client.get(
-                    self.base_url,
-                    params=params,
-                    headers={"Accept": "application/json"}
+            params = {
+                "from": from_offset,
+                "q": query,
+                "size": size,
+                **_SEARCH_PARAMS,
+            }
+            
+            response = await self._client.get(
+                self.base_url,
+                params=params,
+                headers=_SEARCH_HEADERS,
+                timeout=self.timeout
+            )
+            
+            if response.status_code != 200:
+                # Only decode the start of the body; arguments are evaluated even when filtered
+                logger.error(
+                    "Basalam API error: %s - %s",
+                    response.status_code, response.content[:200].decode(errors="replace")
                 )
-                
-                if response.status_code != 200:
-                    logger.error(f"Basalam API error: {response.status_code} - {response.text}")
-                    return None
-                
-                # Parse the JSON response directly
+                return None
+            
+            # Decode the JSON response directly into the fields we need
+            try:
                 try:
-                    response_data = response.json()
-                    return self._transform_json_to_search_response(response_data, from_offset, size)
-                except Exception as e:
-                    logger.error(f"Failed to parse Basalam response: {e}")
-                    logger.debug(f"Raw response: {response.text[:500]}...")
-                    return None
-                
+                    response_data = _search_decoder.decode(response.content)
+                except msgspec.ValidationError as e:
+                    logger.warning("Decoding Basalam products one by one: %s", e)
+                    response_data = self._decode_products_individually(response.content)
+            except Exception as e:
+                logger.error("Failed to parse Basalam response: %s", e)
+                # Decoding the body to text is costly, so only do it when it will be logged
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Raw response: %s...", response.text[:500])
+                return None
+            
+            # Release the raw body before building the response models so
+            # both are not held in memory at once
+            del response
+            return self._transform_to_search_response(response_data, from_offset, size)
+            
         except Exception as e:
-            logger.error(f"Error searching products: {e}")
+            logger.error("Error searching products: %s", e)
             return None
     
-    def _transform_json_to_search_response(
+    @staticmethod
+    def _decode_products_individually(content: bytes) -> BasalamSearchResponseFast:
+        """Decode a search response, skipping only the products that fail to decode."""
+        raw_data = _search_raw_decoder.decode(content)
+        products = []
+        for raw_product in raw_data.products:
+            try:
+                products.append(_product_decoder.decode(raw_product))
+            except msgspec.ValidationError as e:
+                logger.warning("Skipping malformed product: %s", e)
+        return BasalamSearchResponseFast(products=products, meta=raw_data.meta)
+    
+    def _transform_to_search_response(
         self, 
-        response_data: Dict[str, Any], 
+        response_data: BasalamSearchResponseFast, 
         from_offset: int, 
         size: int
     ) -> SearchResponse:
-        """Transform raw JSON response to our API format."""
+        """
+        Transform decoded Basalam response to our API format.
         
-        # Extract products from response
-        products_data = response_data.get("products", [])
+        Models are built with `model_construct` since the decoder has
+        already type-checked and coerced every field.
+        """
+        
+        # Bind hot names locally for the per-product loop; the body is inlined
+        # rather than a helper call per product
+        construct_product = SearchProduct.model_construct
+        construct_image = ProductImage.model_construct
         search_products = []
+        append_product = search_products.append
         
-        for product in products_data:
-            try:
-                # Extract required fields with safe defaults
-                product_id = product.get("id")
-                if not product_id:
-                    continue
-                
-                # Extract vendor information
-                vendor = product.get("vendor", {})
-                vendor_id = vendor.get("id")
-                if not vendor_id:
-                    continue
-                
-                # Extract photo information
-                photo = product.get("photo", {})
-                
-                # Extract status information
-                status = product.get("status", {})
-                
-                # Extract rating information
-                rating = product.get("rating", {})
-                
-                search_product = SearchProduct(
-                    id=product_id,
-                    name=product.get("name", ""),
-                    price=float(product.get("price", 0)),
-                    image=ProductImage(
-                        medium=photo.get("MEDIUM"),
-                        small=photo.get("SMALL")
-                    ),
-                    vendor_id=vendor_id,
-                    vendor_name=vendor.get("name", ""),
-                    status_id=status.get("id", 0),
-                    status_title=status.get("title", ""),
-                    category_title=product.get("categoryTitle", ""),
-                    is_available=product.get("IsAvailable", False),
-                    has_free_shipping=product.get("isFreeShipping", False),
-                    rating_average=float(rating.get("average", 0)),
-                    rating_count=int(rating.get("count", 0)),
-                    stock=int(product.get("stock", 0))
-                )
-                search_products.append(search_product)
-                
-            except Exception as e:
-                logger.warning(f"Failed to parse product {product.get('id', 'unknown')}: {e}")
+        for product in response_data.products:
+            # Extract required fields
+            product_id = product.id
+            vendor = product.vendor
+            if not product_id or vendor is None or not vendor.id:
+                continue
+            
+            # Extract photo, status and rating information
+            photo = product.photo or _EMPTY_PHOTO
+            status = product.status or _EMPTY_STATUS
+            rating = product.rating or _EMPTY_RATING
+            
+            # Field types are already checked by the decoder and
+            # model_construct skips validation, so reject nulls here
+            if None in (
+                product.name, product.price, vendor.name, status.id, status.title,
+                product.categoryTitle, product.IsAvailable, product.isFreeShipping,
+                rating.average, rating.count, product.stock
+            ):
+                logger.warning("Skipping product %s with missing fields", product_id)
                 continue
+            
+            append_product(construct_product(
+                id=product_id,
+                name=product.name,
+                price=product.price,
+                image=construct_image(
+                    medium=photo.MEDIUM,
+                    small=photo.SMALL
+                ),
+                vendor_id=vendor.id,
+                vendor_name=vendor.name,
+                status_id=status.id,
+                status_title=status.title,
+                category_title=product.categoryTitle,
+                is_available=product.IsAvailable,
+                has_free_shipping=product.isFreeShipping,
+                rating_average=rating.average,
+                rating_count=rating.count,
+                stock=product.stock
+            ))
         
         # Extract metadata
-        meta_data = response_data.get("meta", {})
-        total_count = meta_data.get("count", 0)
+        total_count = response_data.meta.count
         current_offset = from_offset
         returned_count = len(search_products)
         has_more = (current_offset + returned_count) < total_count
         
-        meta = SearchMeta(
+        meta = SearchMeta.model_construct(
             total_count=total_count,
             page_size=size,
             current_offset=current_offset,
             has_more=has_more
         )
         
-        logger.info(f"Successfully transformed {len(search_products)} products from Basalam response")
+        logger.info("Successfully transformed %s products from Basalam response", len(search_products))
         
-        return SearchResponse(
+        return SearchResponse.model_construct(
             products=search_products,
             meta=meta
         )
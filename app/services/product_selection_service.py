@@ -1,13 +1,16 @@
 """Service for managing product selections."""
 
+import itertools
 import logging
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 import threading
 from app.models.schemas import (
     SelectProductRequest, 
     SelectedProduct, 
-    SelectedProductsResponse
+    SelectedProductsResponse,
+    BatchSelectError
 )
 
 logger = logging.getLogger(__name__)
@@ -17,12 +20,17 @@ class ProductSelectionService:
     """Service for managing user product selections."""
     
     def __init__(self):
-        # In-memory storage for selected products
+        # In-memory storage for selected products, most recent first
         # In a real application, this would be a database
-        self._selected_products: Dict[int, SelectedProduct] = {}
+        self._selected_products: "OrderedDict[int, SelectedProduct]" = OrderedDict()
         self._search_sessions: Dict[str, int] = {}  # Track which product is selected per search session
+        # Secondary indices into _selected_products
+        self._by_product_id: Dict[int, int] = {}  # product_id -> selection id
+        # vendor_id -> selection ids in insertion order (dict used as an ordered set)
+        self._by_vendor: Dict[int, Dict[int, None]] = defaultdict(dict)
+        # Guards writers only; readers take GIL-atomic snapshots instead
         self._lock = threading.Lock()
-        self._next_id = 1
+        self._selection_ids = itertools.count(1)  # Monotonic selection ids
     
     def select_product(self, request: SelectProductRequest) -> SelectedProduct:
         """
@@ -35,46 +43,120 @@ class ProductSelectionService:
         Returns:
             SelectedProduct object
         """
+        # Take the timestamp before entering the critical section
+        selected_at = datetime.now()
         with self._lock:
-            # Check if product is already selected
-            existing = self._find_by_product_id(request.product_id)
-            if existing:
-                logger.info(f"Product {request.product_id} already selected")
-                return existing
-            
-            # Check if there's already a selection from this search session
-            if request.search_session_id:
-                existing_selection_id = self._search_sessions.get(request.search_session_id)
-                if existing_selection_id:
-                    # Remove the previous selection from this search session
-                    if existing_selection_id in self._selected_products:
-                        old_product = self._selected_products[existing_selection_id]
-                        del self._selected_products[existing_selection_id]
-                        logger.info(f"Replaced previous selection {old_product.product_id} from search session {request.search_session_id}")
+            outcome = self._select_product(request, selected_at)
+        # Log outside the lock to keep the critical section short
+        self._log_selection(request, *outcome)
+        return outcome[0]
+    
+    def select_products(
+        self, 
+        requests: List[SelectProductRequest]
+    ) -> Tuple[List[SelectedProduct], List[BatchSelectError]]:
+        """
+        Add several products to the selection under a single lock acquisition.
+        
+        Args:
+            requests: Product selection requests
             
-            # Create new selected product
-            selected_product = SelectedProduct(
-                id=self._next_id,
-                product_id=request.product_id,
-                product_name=request.product_name,
-                vendor_id=request.vendor_id,
-                vendor_name=request.vendor_name,
-                status_id=request.status_id,
-                image_url=request.image_url,
-                selected_at=datetime.now(),
-                search_session_id=request.search_session_id
+        Returns:
+            Tuple of (selected products, errors for items that failed)
+        """
+        outcomes = []
+        errors: List[BatchSelectError] = []
+        # One timestamp for the whole batch, taken outside the lock
+        selected_at = datetime.now()
+        with self._lock:
+            for index, request in enumerate(requests):
+                try:
+                    outcomes.append((request, self._select_product(request, selected_at)))
+                except Exception as e:
+                    errors.append(BatchSelectError(
+                        index=index,
+                        product_id=request.product_id,
+                        error=str(e)
+                    ))
+        
+        # Log outside the lock to keep the critical section short
+        for request, outcome in outcomes:
+            self._log_selection(request, *outcome)
+        for error in errors:
+            logger.error("Error selecting product %s in batch: %s", error.product_id, error.error)
+        
+        return [outcome[0] for _, outcome in outcomes], errors
+    
+    def _select_product(
+        self, 
+        request: SelectProductRequest,
+        selected_at: datetime
+    ) -> Tuple[SelectedProduct, bool, Optional[SelectedProduct]]:
+        """
+        Helper method to select a product (without lock).
+        
+        Returns:
+            Tuple of (selected product, whether it is newly selected,
+            selection it replaced from the same search session)
+        """
+        # Check if product is already selected
+        existing = self._find_by_product_id(request.product_id)
+        if existing:
+            return existing, False, None
+        
+        old_product = None
+        
+        # Check if there's already a selection from this search session
+        if request.search_session_id:
+            existing_selection_id = self._search_sessions.pop(request.search_session_id, None)
+            if existing_selection_id:
+                # Remove the previous selection from this search session
+                old_product = self._remove_selection(existing_selection_id)
+        
+        # Create new selected product; the request is already validated
+        selected_product = SelectedProduct.model_construct(
+            id=next(self._selection_ids),
+            product_id=request.product_id,
+            product_name=request.product_name,
+            vendor_id=request.vendor_id,
+            vendor_name=request.vendor_name,
+            status_id=request.status_id,
+            image_url=request.image_url,
+            selected_at=selected_at,
+            search_session_id=request.search_session_id
+        )
+        
+        self._selected_products[selected_product.id] = selected_product
+        self._selected_products.move_to_end(selected_product.id, last=False)
+        self._by_product_id[selected_product.product_id] = selected_product.id
+        self._by_vendor[selected_product.vendor_id][selected_product.id] = None
+        
+        # Track this selection for the search session
+        if request.search_session_id:
+            self._search_sessions[request.search_session_id] = selected_product.id
+        
+        return selected_product, True, old_product
+    
+    @staticmethod
+    def _log_selection(
+        request: SelectProductRequest,
+        selected_product: SelectedProduct,
+        is_new: bool,
+        replaced: Optional[SelectedProduct]
+    ) -> None:
+        """Helper method to log the outcome of `_select_product`."""
+        if not is_new:
+            logger.info("Product %s already selected", request.product_id)
+            return
+        if replaced:
+            logger.info(
+                "Replaced previous selection %s from search session %s",
+                replaced.product_id, request.search_session_id
             )
-            
-            self._selected_products[selected_product.id] = selected_product
-            
-            # Track this selection for the search session
-            if request.search_session_id:
-                self._search_sessions[request.search_session_id] = selected_product.id
-            
-            self._next_id += 1
-            
-            logger.info(f"Product {request.product_id} selected successfully (search session: {request.search_session_id})")
-            return selected_product
+        logger.info(
+            "Product %s selected successfully (search session: %s)",
+            request.product_id, request.search_session_id
+        )
     
     def get_selected_products(self) -> SelectedProductsResponse:
         """
@@ -83,15 +165,22 @@ class ProductSelectionService:
         Returns:
             SelectedProductsResponse with all selected products
         """
-        with self._lock:
-            products = list(self._selected_products.values())
-            # Sort by selection time (most recent first)
-            products.sort(key=lambda p: p.selected_at, reverse=True)
-            
-            return SelectedProductsResponse(
-                products=products,
-                total_count=len(products)
-            )
+        # Storage is already ordered by selection time (most recent first)
+        products = list(self._selected_products.values())
+        
+        return SelectedProductsResponse.model_construct(
+            products=products,
+            total_count=len(products)
+        )
+    
+    def is_empty(self) -> bool:
+        """
+        Check whether there are no selected products.
+        
+        Returns:
+            True if nothing is selected, False otherwise
+        """
+        return not self._selected_products
     
     def remove_product(self, product_id: int) -> bool:
         """
@@ -105,19 +194,16 @@ class ProductSelectionService:
         """
         with self._lock:
             # Find the selection by product_id
-            selection_id = None
-            for sel_id, product in self._selected_products.items():
-                if product.product_id == product_id:
-                    selection_id = sel_id
-                    break
-            
+            selection_id = self._by_product_id.get(product_id)
             if selection_id is not None:
-                del self._selected_products[selection_id]
-                logger.info(f"Product {product_id} removed from selection")
-                return True
-            
-            logger.warning(f"Product {product_id} not found in selection")
-            return False
+                self._remove_selection(selection_id)
+        
+        if selection_id is not None:
+            logger.info("Product %s removed from selection", product_id)
+            return True
+        
+        logger.warning("Product %s not found in selection", product_id)
+        return False
     
     def clear_selections(self) -> int:
         """
@@ -130,8 +216,11 @@ class ProductSelectionService:
             count = len(self._selected_products)
             self._selected_products.clear()
             self._search_sessions.clear()
-            logger.info(f"Cleared {count} selected products and search sessions")
-            return count
+            self._by_product_id.clear()
+            self._by_vendor.clear()
+        
+        logger.info("Cleared %s selected products and search sessions", count)
+        return count
     
     def get_product_by_id(self, product_id: int) -> Optional[SelectedProduct]:
         """
@@ -143,15 +232,24 @@ class ProductSelectionService:
         Returns:
             SelectedProduct if found, None otherwise
         """
-        with self._lock:
-            return self._find_by_product_id(product_id)
+        return self._find_by_product_id(product_id)
     
     def _find_by_product_id(self, product_id: int) -> Optional[SelectedProduct]:
-        """Helper method to find a product by product_id (without lock)."""
-        for product in self._selected_products.values():
-            if product.product_id == product_id:
-                return product
-        return None
+        """Helper method to find a product by product_id (safe without lock)."""
+        selection_id = self._by_product_id.get(product_id)
+        return self._selected_products.get(selection_id) if selection_id else None
+    
+    def _remove_selection(self, selection_id: int) -> Optional[SelectedProduct]:
+        """Helper method to remove a selection and its index entries (without lock)."""
+        product = self._selected_products.pop(selection_id, None)
+        if product:
+            self._by_product_id.pop(product.product_id, None)
+            vendor_selections = self._by_vendor.get(product.vendor_id)
+            if vendor_selections is not None:
+                vendor_selections.pop(selection_id, None)
+                if not vendor_selections:
+                    del self._by_vendor[product.vendor_id]
+        return product
     
     def get_selections_by_vendor(self, vendor_id: int) -> List[SelectedProduct]:
         """
@@ -163,11 +261,7 @@ class ProductSelectionService:
         Returns:
             List of selected products from the vendor
         """
-        with self._lock:
-            vendor_products = [
-                product for product in self._selected_products.values() 
-                if product.vendor_id == vendor_id
-            ]
-            # Sort by selection time
-            vendor_products.sort(key=lambda p: p.selected_at, reverse=True)
-            return vendor_products
+        # The index keeps insertion order, so reverse it for most recent first
+        selection_ids = list(reversed(self._by_vendor.get(vendor_id, {})))
+        # map/filter keep the lookup loop in C; filter(None) drops ids removed concurrently
+        return list(filter(None, map(self._selected_products.get, selection_ids)))
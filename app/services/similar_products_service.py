@@ -1,11 +1,22 @@
 """Service for Basalam Similar Products (MLT - More Like This) API integration."""
 
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import random
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Set
 import httpx
-from collections import defaultdict
+import msgspec
+import redis.asyncio as redis
+from cachetools import TTLCache
 
 from app.core.config import settings
+from app.models.basalam_fast import (
+    BasalamMltResponseFast,
+    BasalamPhotoFast,
+    BasalamStatusFast
+)
 from app.models.schemas import (
     SelectedProduct, 
     SimilarProduct, 
@@ -15,15 +26,65 @@ from app.models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# MLT pages share the search products' shape; decode only the fields we map
+_mlt_decoder = msgspec.json.Decoder(BasalamMltResponseFast, strict=False)
+
+# Product pages on Basalam are https://basalam.com/p/{product_id}
+_PRODUCT_URL_PREFIX = "https://basalam.com/p/"
+
+# Stand-ins for nested objects missing from a product
+_EMPTY_PHOTO = BasalamPhotoFast()
+_EMPTY_STATUS = BasalamStatusFast()
+
+
+@dataclass(slots=True)
+class _VendorAgg:
+    """Per-vendor accumulator used while analyzing overlaps."""
+    vendor_name: str
+    covered: Set[int] = field(default_factory=set)  # Covered user product ids
+    products: List[SimilarProduct] = field(default_factory=list)
+
 
 class SimilarProductsService:
     """Service for finding similar products and analyzing vendor overlaps."""
     
-    def __init__(self):
+    def __init__(
+        self, 
+        client: Optional[httpx.AsyncClient] = None,
+        redis_client: Optional[redis.Redis] = None
+    ):
         self.mlt_api_url = "https://search.basalam.com/ai-engine/api/v2.0/mlt"
         self.timeout = 15.0
         self.max_similar_products_per_item = 100
         self.page_size = 24  # Default page size for pagination
+        self.max_concurrent_items = 10  # Parallel MLT lookups, kept low to respect Basalam rate limits
+        self.max_retries = settings.MLT_MAX_RETRIES
+        # Example products kept per vendor once it covers every selected product
+        self.max_products_per_saturated_vendor = 10
+        # Bounds in-flight MLT requests across all items and concurrent confirmations
+        self._request_semaphore = asyncio.Semaphore(settings.MLT_MAX_CONCURRENT_REQUESTS)
+        # Pooled client, normally shared application-wide via the lifespan
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+        # Successfully parsed pages keyed by (product_id, from_offset, size); raw
+        # bodies are also kept in Redis (when configured) so they survive restarts
+        # and are shared between workers
+        self.page_cache_ttl = 600
+        self._page_cache: TTLCache = TTLCache(maxsize=4096, ttl=self.page_cache_ttl)
+        self._redis = redis_client
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client if this service created it."""
+        if self._owns_client:
+            await self._client.aclose()
+    
+    def clear_cache(self) -> None:
+        """Drop all in-process cached MLT pages (Redis entries expire on their own)."""
+        self._page_cache.clear()
     
     async def find_vendor_overlaps(
         self, 
@@ -46,16 +107,29 @@ class SimilarProductsService:
                 processing_summary={}
             )
         
-        logger.info(f"Starting vendor overlap analysis for {len(selected_products)} selected products")
+        logger.info("Starting vendor overlap analysis for %s selected products", len(selected_products))
         
         all_similar_products = []
         processing_summary = {}
         
-        # Find similar products for each selected product
-        for selected_product in selected_products:
-            logger.info(f"Finding similar products for: {selected_product.product_name}")
+        # Find similar products for all selected products concurrently
+        semaphore = asyncio.Semaphore(self.max_concurrent_items)
+        
+        async def find_for_item(selected_product: SelectedProduct) -> List[SimilarProduct]:
+            async with semaphore:
+                logger.info("Finding similar products for: %s", selected_product.product_name)
+                return await self._find_similar_products_for_item(selected_product)
+        
+        results = await asyncio.gather(
+            *(find_for_item(p) for p in selected_products),
+            return_exceptions=True
+        )
+        
+        for selected_product, similar_products in zip(selected_products, results):
+            if isinstance(similar_products, BaseException):
+                logger.error("Error finding similar products for %s: %s", selected_product.product_id, similar_products)
+                similar_products = []
             
-            similar_products = await self._find_similar_products_for_item(selected_product)
             all_similar_products.extend(similar_products)
             
             processing_summary[selected_product.product_id] = {
@@ -64,23 +138,19 @@ class SimilarProductsService:
                 "vendors_found": len(set(p.vendor_id for p in similar_products))
             }
             
-            logger.info(f"Found {len(similar_products)} similar products for {selected_product.product_name}")
-        
-        # Analyze vendor overlaps
-        vendor_overlaps = self._analyze_vendor_overlaps(selected_products, all_similar_products)
+            logger.info("Found %s similar products for %s", len(similar_products), selected_product.product_name)
         
-        # Filter vendors with at least 2 matches
-        vendors_with_multiple_matches = [
-            vendor for vendor in vendor_overlaps 
-            if vendor.matched_products_count >= 2
-        ]
+        # Analyze vendor overlaps, keeping only vendors with at least 2 matches
+        vendors_with_multiple_matches = self._analyze_vendor_overlaps(
+            selected_products, all_similar_products, min_matches=2
+        )
         
         # Sort by number of matches (descending) and then by vendor name
         vendors_with_multiple_matches.sort(
             key=lambda v: (-v.matched_products_count, v.vendor_name)
         )
         
-        logger.info(f"Found {len(vendors_with_multiple_matches)} vendors with multiple matches")
+        logger.info("Found %s vendors with multiple matches", len(vendors_with_multiple_matches))
         
         return CartConfirmationResponse(
             total_selected_products=len(selected_products),
@@ -102,35 +172,39 @@ class SimilarProductsService:
         Returns:
             List of similar products
         """
+        # Page layout up to the per-item limit, e.g. sizes 24, 24, 24, 24, 4
+        pages = [
+            (offset, min(self.page_size, self.max_similar_products_per_item - offset))
+            for offset in range(0, self.max_similar_products_per_item, self.page_size)
+        ]
         similar_products = []
-        from_offset = 0
         
         try:
-            while len(similar_products) < self.max_similar_products_per_item:
-                # Calculate how many more products we need
-                remaining_needed = self.max_similar_products_per_item - len(similar_products)
-                current_page_size = min(self.page_size, remaining_needed)
-                
-                # Make API request
-                page_products = await self._fetch_similar_products_page(
-                    selected_product, from_offset, current_page_size
-                )
-                
-                if not page_products:
-                    # No more products available
-                    break
-                
+            # Fetch the first page alone so items with few matches cost one request
+            first_offset, first_size = pages[0]
+            # Copy, since pages may be shared with the page cache
+            similar_products = list(await self._fetch_similar_products_page(
+                selected_product, first_offset, first_size
+            ))
+            if len(similar_products) < first_size:
+                return similar_products
+            
+            # The first page was full, so fetch the remaining pages concurrently
+            remaining_pages = await asyncio.gather(*(
+                self._fetch_similar_products_page(selected_product, offset, size)
+                for offset, size in pages[1:]
+            ))
+            
+            for (offset, size), page_products in zip(pages[1:], remaining_pages):
                 similar_products.extend(page_products)
-                from_offset += len(page_products)
-                
-                # If we got fewer products than requested, we've reached the end
-                if len(page_products) < current_page_size:
+                # A short page means we've reached the end; later pages are not contiguous
+                if len(page_products) < size:
                     break
-                
-                logger.debug(f"Fetched {len(page_products)} products, total: {len(similar_products)}")
+            
+            logger.debug("Fetched %s products in %s pages", len(similar_products), len(pages))
         
         except Exception as e:
-            logger.error(f"Error finding similar products for {selected_product.product_id}: {e}")
+            logger.error("Error finding similar products for %s: %s", selected_product.product_id, e)
         
         return similar_products[:self.max_similar_products_per_item]
     
@@ -151,128 +225,177 @@ class SimilarProductsService:
         Returns:
             List of similar products from this page
         """
+        # Key on every parameter that varies between requests; fromCard/ads are fixed
+        product_id = selected_product.product_id
+        title = selected_product.product_name
+        status_id = selected_product.status_id
+        cache_key = (product_id, title, status_id, from_offset, size)
+        cached = self._page_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Hash the free-text title to keep the Redis key short and ASCII
+        title_hash = hashlib.blake2b(title.encode()).hexdigest()[:16]
+        redis_key = f"mlt:{product_id}:{status_id}:{from_offset}:{size}:{title_hash}"
+        if self._redis is not None:
+            try:
+                stored = await self._redis.get(redis_key)
+                if stored is not None:
+                    page_products = self._parse_similar_products_response(
+                        _mlt_decoder.decode(stored), selected_product.product_id
+                    )
+                    self._page_cache[cache_key] = page_products
+                    return page_products
+            except Exception as e:
+                logger.warning("Redis lookup failed for %s: %s", redis_key, e)
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                params = {
-                    "fromCard": "true",
-                    "ads": "false", 
-                    "title": selected_product.product_name,
-                    "productId": selected_product.product_id,
-                    "status": selected_product.status_id,
-                    "from": from_offset,
-                    "size": size
-                }
-                
-                response = await client.get(
-                    self.mlt_api_url,
-                    params=params,
-                    headers={"Accept": "application/json"}
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"MLT API error: {response.status_code} - {response.text}")
-                    return []
-                
-                # Parse the JSON response
-                response_data = response.json()
-                return self._parse_similar_products_response(
-                    response_data, selected_product.product_id
+            params = {
+                "fromCard": "true",
+                "ads": "false", 
+                "title": title,
+                "productId": product_id,
+                "status": status_id,
+                "from": from_offset,
+                "size": size
+            }
+            
+            for attempt in range(self.max_retries + 1):
+                async with self._request_semaphore:
+                    response = await self._client.get(
+                        self.mlt_api_url,
+                        params=params,
+                        headers={"Accept": "application/json"},
+                        timeout=self.timeout
+                    )
+                if response.status_code != 429 or attempt == self.max_retries:
+                    break
+                # Rate limited: back off with jitter, without holding a request slot
+                delay = min(10, 2 ** attempt) + random.random()
+                logger.warning("MLT API rate limited, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+            
+            if response.status_code != 200:
+                # Only decode the start of the body; arguments are evaluated even when filtered
+                logger.error(
+                    "MLT API error: %s - %s",
+                    response.status_code, response.content[:200].decode(errors="replace")
                 )
-                
+                return []
+            
+            # Decode the JSON response directly into the fields we need
+            response_data = _mlt_decoder.decode(response.content)
+            page_products = self._parse_similar_products_response(
+                response_data, selected_product.product_id
+            )
+            # Error paths return early above, so only good pages are cached
+            self._page_cache[cache_key] = page_products
+            if self._redis is not None:
+                try:
+                    await self._redis.set(redis_key, response.content, ex=settings.MLT_CACHE_TTL)
+                except Exception as e:
+                    logger.warning("Redis store failed for %s: %s", redis_key, e)
+            return page_products
+            
         except Exception as e:
-            logger.error(f"Error fetching similar products page: {e}")
+            logger.error("Error fetching similar products page: %s", e)
             return []
     
     def _parse_similar_products_response(
         self, 
-        response_data: Dict[str, Any], 
+        response_data: BasalamMltResponseFast, 
         original_product_id: int
     ) -> List[SimilarProduct]:
         """
-        Parse the MLT API response and convert to SimilarProduct objects.
+        Convert a decoded MLT API response to SimilarProduct objects.
+        
+        Models are built with `model_construct` since the decoder has
+        already type-checked and coerced every field.
         
         Args:
-            response_data: Raw API response
+            response_data: Decoded API response
             original_product_id: ID of the original selected product
             
         Returns:
             List of SimilarProduct objects
         """
         similar_products = []
-        products_data = response_data.get("products", [])
         
-        for product in products_data:
-            try:
-                product_id = product.get("id")
-                if not product_id:
-                    continue
-                
-                vendor = product.get("vendor", {})
-                vendor_id = vendor.get("id")
-                if not vendor_id:
-                    continue
-                
-                photo = product.get("photo", {})
-                status = product.get("status", {})
-                
-                similar_product = SimilarProduct(
-                    id=product_id,
-                    name=product.get("name", ""),
-                    price=float(product.get("price", 0)),
-                    vendor_id=vendor_id,
-                    vendor_name=vendor.get("name", ""),
-                    status_id=status.get("id", 0),
-                    image_url=photo.get("MEDIUM") or photo.get("SMALL"),
-                    basalam_url=f"https://basalam.com/p/{product_id}",
-                    original_product_id=original_product_id
-                )
-                similar_products.append(similar_product)
-                
-            except Exception as e:
-                logger.warning(f"Failed to parse similar product {product.get('id', 'unknown')}: {e}")
+        for product in response_data.products:
+            product_id = product.id
+            vendor = product.vendor
+            if not product_id or vendor is None or not vendor.id:
                 continue
+            
+            photo = product.photo or _EMPTY_PHOTO
+            status = product.status or _EMPTY_STATUS
+            
+            # model_construct skips validation, so reject nulls here
+            if None in (product.name, product.price, vendor.name, status.id):
+                logger.warning("Skipping similar product %s with missing fields", product_id)
+                continue
+            
+            similar_products.append(SimilarProduct.model_construct(
+                id=product_id,
+                name=product.name,
+                price=float(product.price),
+                vendor_id=vendor.id,
+                vendor_name=vendor.name,
+                status_id=status.id,
+                image_url=photo.MEDIUM or photo.SMALL,
+                basalam_url=f"{_PRODUCT_URL_PREFIX}{product_id}",
+                original_product_id=original_product_id
+            ))
         
         return similar_products
     
     def _analyze_vendor_overlaps(
         self, 
         selected_products: List[SelectedProduct], 
-        all_similar_products: List[SimilarProduct]
+        all_similar_products: List[SimilarProduct],
+        min_matches: int = 1
     ) -> List[VendorMatch]:
         """
         Analyze vendor overlaps from similar products.
         
+        Grouping and coverage counting happen in a single pass; VendorMatch
+        models are only built for vendors that pass the `min_matches` filter.
+        Once a vendor covers every selected product, further products only
+        add examples, so they are capped at `max_products_per_saturated_vendor`.
+        
         Args:
             selected_products: User's selected products
             all_similar_products: All similar products found
+            min_matches: Minimum number of covered user products to keep a vendor
             
         Returns:
             List of VendorMatch objects
         """
-        # Group similar products by vendor
-        vendor_products = defaultdict(list)
-        for similar_product in all_similar_products:
-            vendor_products[similar_product.vendor_id].append(similar_product)
-        
-        vendor_matches = []
+        total_selected = len(selected_products)
+        max_examples = self.max_products_per_saturated_vendor
         
-        for vendor_id, products in vendor_products.items():
-            # Find which of the user's selected products this vendor has similar items for
-            user_products_covered = set()
-            for product in products:
-                user_products_covered.add(product.original_product_id)
-            
-            # Only include vendors that have similar products for at least 1 user product
-            if len(user_products_covered) >= 1:
-                vendor_name = products[0].vendor_name if products else ""
-                
-                vendor_match = VendorMatch(
-                    vendor_id=vendor_id,
-                    vendor_name=vendor_name,
-                    matched_products_count=len(user_products_covered),
-                    user_selected_products=list(user_products_covered),
-                    similar_products=products
-                )
-                vendor_matches.append(vendor_match)
+        aggs: Dict[int, _VendorAgg] = {}
+        for similar_product in all_similar_products:
+            agg = aggs.get(similar_product.vendor_id)
+            if agg is None:
+                agg = aggs[similar_product.vendor_id] = _VendorAgg(similar_product.vendor_name)
+            covered = agg.covered
+            if similar_product.original_product_id not in covered:
+                covered.add(similar_product.original_product_id)
+            elif len(covered) >= total_selected and len(agg.products) >= max_examples:
+                # Saturated vendor with enough examples; this adds nothing to the overlap
+                continue
+            agg.products.append(similar_product)
         
-        return vendor_matches
+        # Every field comes from already-validated models, so skip revalidation
+        return [
+            VendorMatch.model_construct(
+                vendor_id=vendor_id,
+                vendor_name=agg.vendor_name,
+                matched_products_count=len(agg.covered),
+                user_selected_products=list(agg.covered),
+                similar_products=agg.products
+            )
+            for vendor_id, agg in aggs.items()
+            if len(agg.covered) >= min_matches
+        ]
@@ -1,86 +1,141 @@
 """Management of Telegram bot messages and interactions."""
 
 import os
-import threading
-from typing import List
-import asyncio  # <--- ۱. این خط باید اضافه شود
+from collections import defaultdict
+from typing import List, Optional
+import httpx
 
 from telegram import Update
-from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters
+from telegram.ext import Application, ApplicationBuilder, ContextTypes, MessageHandler, filters
 
-from .gemini_service import extract_products
+from .gemini_service import extract_products_cached
 from .search_engine import search_vendor_overlap
 
+BASE_URL = "https://basalam.com"
+PRODUCT_URL_PREFIX = f"{BASE_URL}/p/"
+
+# Vendor sections are packed into messages up to this length (Telegram's hard limit is 4096)
+TELEGRAM_MESSAGE_LIMIT = 4000
+
+# Fixed replies
+NO_PRODUCTS_TEXT = "محصولی یافت نشد."
+NO_SHARED_VENDOR_TEXT = "هیچ غرفه‌ای حداقل دو محصول درخواستی شما را ندارد."
+
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Parse incoming message and reply with matching stalls and Gemini raw output."""
     if not update.message:
         return
-    products, raw_output = extract_products(update.message.text)
+    products, raw_output = await extract_products_cached(update.message.text)
     if not products:
-        await update.message.reply_text("محصولی یافت نشد.")
+        await update.message.reply_text(NO_PRODUCTS_TEXT)
         return
     # Call Basalam per product, find overlapping vendors
-    # Run the blocking search in a thread to avoid blocking the async handler
-    result = await asyncio.to_thread(search_vendor_overlap, products)
+    result = await search_vendor_overlap(products, context.application.bot_data["http"])
     vendors = result.get("vendors", [])
     items = result.get("matches", [])
     if not vendors:
-        await update.message.reply_text("هیچ غرفه‌ای حداقل دو محصول درخواستی شما را ندارد.")
+        await update.message.reply_text(NO_SHARED_VENDOR_TEXT)
         return
     # Prepare per-vendor, per-query grouped messages with product URLs
     # Build lookup of items by (vendor_id, query_term)
-    from collections import defaultdict
     grouped: dict[tuple[int, str], list[dict]] = defaultdict(list)
     for it in items:
         key = (it.get("vendor_id"), it.get("query_term") or "")
         grouped[key].append(it)
 
-    BASE_URL = "https://basalam.com"
-
-    for vendor in vendors:
-        vendor_id = vendor["vendor_id"]
-        vendor_name = vendor.get("vendor_name") or ""
-        # Start message with vendor heading
-        lines: list[str] = [f"{vendor_name} (ID: {vendor_id})", ""]
-        # For each original query in order, list products of this vendor that match that query
-        for term in products:
-            vendor_query_items = grouped.get((vendor_id, term), [])
-            if not vendor_query_items:
-                continue
-            lines.append(f"{term}:")
-            lines.append("")
-            for it in vendor_query_items:
-                product_name = it.get("product_name") or ""
-                product_id = it.get("product_id")
-                # Construct product address per requested pattern
-                product_address = f"{BASE_URL}/p/{product_id}"
-                lines.append(product_name)
-                lines.append(product_address)
-                lines.append("")
-        # Send one message per vendor
-        message_text = "\n".join(lines).strip()
-        if message_text:
-            await update.message.reply_text(message_text)
-
-
-def start_bot() -> None:
-    """Start the Telegram bot in a background thread."""
+    # Terms as searched (normalized and de-duplicated), matching each item's query_term
+    terms = result.get("terms", [])
+
+    # One section per vendor, packed into as few messages as fit
+    texts = [
+        message_text
+        for vendor in vendors
+        if (message_text := _format_vendor_message(vendor, terms, grouped))
+    ]
+    # Packing leaves one or two messages, so send them one at a time: concurrent
+    # sends to one chat can arrive out of ranking order, and Telegram allows
+    # only about one message per second per chat anyway
+    for message_text in _pack_messages(texts):
+        await update.message.reply_text(message_text)
+
+
+def _pack_messages(texts: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Join consecutive texts, separated by a blank line, into messages of at most `limit` chars.
+
+    A single text longer than `limit` is sent on its own.
+    """
+    packed: List[str] = []
+    current = ""
+    for text in texts:
+        if current and len(current) + 2 + len(text) > limit:
+            packed.append(current)
+            current = text
+        else:
+            current = f"{current}\n\n{text}" if current else text
+    if current:
+        packed.append(current)
+    return packed
+
+
+def _format_vendor_message(
+    vendor: dict, terms: List[str], grouped: dict[tuple[int, str], list[dict]]
+) -> str:
+    """Build the reply for one vendor: a heading, then its products under each query term.
+
+    Each block is rendered with a single join rather than one list entry per line.
+    """
+    vendor_id = vendor["vendor_id"]
+    vendor_name = vendor.get("vendor_name") or ""
+    blocks: list[str] = [f"{vendor_name} (ID: {vendor_id})\n\n"]
+    # For each original query in order, list products of this vendor that match that query
+    for term in terms:
+        vendor_query_items = grouped.get((vendor_id, term))
+        if not vendor_query_items:
+            continue
+        blocks.append(f"{term}:\n\n")
+        # Product name followed by its address per requested pattern
+        blocks.extend(
+            f"{it.get('product_name') or ''}\n{PRODUCT_URL_PREFIX}{it.get('product_id')}\n\n"
+            for it in vendor_query_items
+        )
+    return "".join(blocks).strip()
+
+
+async def start_bot() -> Optional[Application]:
+    """Start polling on the running event loop (e.g. from the FastAPI lifespan).
+
+    Returns the running Application so the caller can pass it to `stop_bot`,
+    or None if BOT_TOKEN is not set.
+    """
     BOT_TOKEN = os.getenv("BOT_TOKEN")
 
     if not BOT_TOKEN:
         print("BOT_TOKEN is not set.")
-        return
+        return None
 
     application = ApplicationBuilder().token(BOT_TOKEN).build()
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
-    # ۲. یک تابع کمکی برای مدیریت event loop در thread جدید تعریف می‌کنیم
-    def run_polling_in_new_loop():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(application.run_polling(poll_interval=3))
+    # Shared outbound client for Basalam calls made by handlers
+    application.bot_data["http"] = httpx.AsyncClient(
+        http2=True,
+        timeout=15,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    )
+
+    # Poll on the caller's loop instead of a separate thread with its own loop
+    await application.initialize()
+    await application.start()
+    await application.updater.start_polling(poll_interval=3)
+    return application
+
 
-    # ۳. این thread جدید را با تابع کمکی اجرا می‌کنیم
-    thread = threading.Thread(target=run_polling_in_new_loop, daemon=True)
-    thread.start()
\ No newline at end of file
+async def stop_bot(application: Application) -> None:
+    """Stop polling and shut down an Application started by `start_bot`."""
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+    client = application.bot_data.pop("http", None)
+    if client is not None:
+        await client.aclose()
@@ -1,9 +1,14 @@
 """Miscellaneous helper functions."""
 
-from difflib import SequenceMatcher
+from rapidfuzz.distance import Indel
 
 
 def fuzzy_match(a: str, b: str, threshold: float = 0.8) -> bool:
-    """Return True if `a` and `b` are similar enough."""
-    ratio = SequenceMatcher(None, a, b).ratio()
+    """Return True if `a` and `b` are similar enough.
+
+    Uses Indel-normalized similarity, computed in C. This is close to, but not
+    identical to, `difflib.SequenceMatcher.ratio()`; it can score a pair higher,
+    so borderline pairs may now pass the threshold.
+    """
+    ratio = Indel.normalized_similarity(a, b, score_cutoff=threshold)
     return ratio >= threshold
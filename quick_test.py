@@ -3,14 +3,13 @@
 Quick test to verify server is working and test the cart confirmation functionality.
 """
 
-import requests
-import time
-import json
+import asyncio
+import httpx
 
-def test_server_health():
+async def test_server_health(client):
     """Test if server is running."""
     try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        response = await client.get("http://localhost:8000/health", timeout=5)
         if response.status_code == 200:
             print("✅ Server is running and healthy")
             return True
@@ -21,10 +20,10 @@ def test_server_health():
         print(f"❌ Server connection failed: {e}")
         return False
 
-def test_search_endpoint():
+async def test_search_endpoint(client):
     """Test the search endpoint."""
     try:
-        response = requests.get(
+        response = await client.get(
             "http://localhost:8000/api/v1/search/products",
             params={"q": "جامدادی", "from": 0, "size": 3},
             timeout=10
@@ -41,7 +40,7 @@ def test_search_endpoint():
         print(f"❌ Search test failed: {e}")
         return []
 
-def test_product_selection(products):
+async def test_product_selection(client, products):
     """Test product selection."""
     if not products:
         print("❌ No products to select")
@@ -59,7 +58,7 @@ def test_product_selection(products):
             "search_session_id": "test-session-1"
         }
         
-        response = requests.post(
+        response = await client.post(
             "http://localhost:8000/api/v1/selections/products",
             json=selection_data,
             timeout=5
@@ -75,10 +74,10 @@ def test_product_selection(products):
         print(f"❌ Product selection test failed: {e}")
         return False
 
-def test_get_selections():
+async def test_get_selections(client):
     """Test getting selections."""
     try:
-        response = requests.get("http://localhost:8000/api/v1/selections/products", timeout=5)
+        response = await client.get("http://localhost:8000/api/v1/selections/products", timeout=5)
         
         if response.status_code == 200:
             data = response.json()
@@ -91,10 +90,10 @@ def test_get_selections():
         print(f"❌ Get selections test failed: {e}")
         return False
 
-def test_cart_confirmation():
+async def test_cart_confirmation(client):
     """Test cart confirmation endpoint."""
     try:
-        response = requests.post(
+        response = await client.post(
             "http://localhost:8000/api/v1/selections/confirm",
             timeout=30  # Give it time for API calls
         )
@@ -122,37 +121,33 @@ def test_cart_confirmation():
         print(f"❌ Cart confirmation test failed: {e}")
         return False
 
-def main():
+async def main():
     """Run all tests."""
     print("🧪 Quick API Test")
     print("=" * 30)
     
-    # Test server health
-    if not test_server_health():
-        print("\n❌ Server is not running. Start with: py start_server.py")
-        return
-    
-    time.sleep(1)
-    
-    # Test search
-    products = test_search_endpoint()
-    time.sleep(1)
-    
-    # Test selection
-    if products:
-        test_product_selection(products)
-        time.sleep(1)
+    async with httpx.AsyncClient() as client:
+        # Health and search are independent, so run them concurrently
+        healthy, products = await asyncio.gather(
+            test_server_health(client),
+            test_search_endpoint(client)
+        )
+        if not healthy:
+            print("\n❌ Server is not running. Start with: py start_server.py")
+            return
         
-        # Test get selections
-        if test_get_selections():
-            time.sleep(1)
+        # Selection -> get -> confirm depend on each other
+        if products:
+            await test_product_selection(client, products)
             
-            # Test cart confirmation
-            test_cart_confirmation()
+            # Test get selections
+            if await test_get_selections(client):
+                # Test cart confirmation
+                await test_cart_confirmation(client)
     
     print("\n" + "=" * 30)
     print("🎉 Quick test completed!")
     print("🌐 Visit: http://localhost:8000/api/v1/docs")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
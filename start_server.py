@@ -5,8 +5,10 @@ Startup script for the Salamyar Product Search API.
 This script starts the FastAPI server with appropriate settings.
 """
 
-import uvicorn
 import logging
+import os
+
+import uvicorn
 from app.core.config import settings
 
 # Configure logging
@@ -20,11 +22,25 @@ logger = logging.getLogger(__name__)
 if __name__ == "__main__":
     logger.info(f"Starting {settings.PROJECT_NAME} v{settings.VERSION}")
     logger.info(f"API documentation will be available at: http://localhost:8000{settings.API_V1_STR}/docs")
-    
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,  # Enable auto-reload for development
-        log_level="info"
-    )
+
+    if os.getenv("ENV", "dev") == "dev":
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,  # Enable auto-reload for development
+            log_level="info"
+        )
+    else:
+        # Selections live in process memory, so extra workers only make sense
+        # once that state is shared; scale out explicitly via WEB_CONCURRENCY.
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            access_log=False,
+            log_level="info"
+        )
@@ -84,6 +84,205 @@ async def test_basalam_service():
         print(f"❌ Basalam service test error: {e}")
         return False
 
+async def test_malformed_product():
+    """Test that one malformed product is skipped without failing the search."""
+    print("\n🧩 Testing malformed product handling...")
+    
+    try:
+        import httpx
+        import orjson
+        from app.services.basalam_service import BasalamService
+        
+        def product(product_id, **overrides):
+            data = {
+                "id": product_id,
+                "name": f"Product {product_id}",
+                "price": 1000,
+                "photo": {"MEDIUM": "m.jpg", "SMALL": "s.jpg"},
+                "vendor": {"id": 10, "name": "Vendor"},
+                "status": {"id": 2976, "title": "Active"},
+                "categoryTitle": "Category",
+                "IsAvailable": True,
+                "isFreeShipping": False,
+                "rating": {"average": 4.5, "count": 3},
+                "stock": 5
+            }
+            data.update(overrides)
+            return data
+        
+        # The middle product has a string vendor and a non-numeric price
+        payload = orjson.dumps({
+            "products": [
+                product(1),
+                product(2, vendor="oops", price="free"),
+                product(3)
+            ],
+            "meta": {"count": 3}
+        })
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=payload))
+        
+        async with httpx.AsyncClient(transport=transport) as client:
+            service = BasalamService(client)
+            result = await service.search_products("test")
+        
+        if result is None:
+            print("❌ Search failed because of one malformed product")
+            return False
+        ids = [p.id for p in result.products]
+        if ids != [1, 3] or result.meta.total_count != 3:
+            print(f"❌ Unexpected products after skipping malformed one: {ids}")
+            return False
+        
+        print(f"✅ Malformed product skipped, kept products {ids}")
+        return True
+    except Exception as e:
+        print(f"❌ Malformed product test error: {e}")
+        return False
+
+def test_vendor_saturation_cap():
+    """Test that a vendor covering every selected product keeps a capped number of examples."""
+    print("\n🏪 Testing vendor saturation cap...")
+    
+    try:
+        from datetime import datetime
+        from app.services.similar_products_service import SimilarProductsService
+        from app.models.schemas import SelectedProduct, SimilarProduct
+        
+        service = SimilarProductsService()
+        cap = service.max_products_per_saturated_vendor
+        selected = [
+            SelectedProduct(
+                id=i, product_id=100 * i, product_name=f"Selected {i}",
+                vendor_id=1, vendor_name="Vendor", status_id=2976, selected_at=datetime.now()
+            )
+            for i in (1, 2)
+        ]
+        
+        def similar(product_id, vendor_id, original_product_id):
+            return SimilarProduct(
+                id=product_id, name=f"Product {product_id}", price=1000,
+                vendor_id=vendor_id, vendor_name=f"Vendor {vendor_id}", status_id=2976,
+                basalam_url=f"https://basalam.com/p/{product_id}",
+                original_product_id=original_product_id
+            )
+        
+        # Vendor 1 covers both products early, then keeps appearing;
+        # vendor 2 only ever covers one, so it is never capped
+        products = [similar(1, 1, 100), similar(2, 1, 200)]
+        products += [similar(10 + i, 1, 100 + 100 * (i % 2)) for i in range(cap + 5)]
+        products += [similar(50 + i, 2, 100) for i in range(cap + 5)]
+        
+        vendors = {v.vendor_id: v for v in service._analyze_vendor_overlaps(selected, products)}
+        if vendors[1].matched_products_count != 2 or len(vendors[1].similar_products) != cap:
+            print(f"❌ Saturated vendor not capped: {len(vendors[1].similar_products)} products")
+            return False
+        if len(vendors[2].similar_products) != cap + 5:
+            print(f"❌ Unsaturated vendor lost products: {len(vendors[2].similar_products)}")
+            return False
+        
+        print(f"✅ Saturated vendor capped at {cap} products")
+        return True
+    except Exception as e:
+        print(f"❌ Vendor saturation test error: {e}")
+        return False
+
+async def test_search_term_dedup():
+    """Test that repeated terms are searched once and returned normalized."""
+    print("\n🔤 Testing search term de-duplication...")
+    
+    try:
+        import httpx
+        import orjson
+        from app import search_engine
+        
+        queries = []
+        def handler(request):
+            queries.append(request.url.params["q"])
+            return httpx.Response(200, content=orjson.dumps({"products": []}))
+        
+        search_engine.clear_cache()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            result = await search_engine.search_vendor_overlap(
+                ["Pen", " pen ", "PEN", "", "book"], client
+            )
+        
+        if result["terms"] != ["Pen", "book"] or sorted(queries) != ["Pen", "book"]:
+            print(f"❌ Unexpected terms {result['terms']} or queries {queries}")
+            return False
+        
+        print(f"✅ Terms de-duplicated to {result['terms']}")
+        return True
+    except Exception as e:
+        print(f"❌ Search term de-duplication test error: {e}")
+        return False
+
+async def test_search_single_flight():
+    """Test that concurrent searches for the same term share one request."""
+    print("\n✈️ Testing single-flight search fetches...")
+    
+    try:
+        import httpx
+        import orjson
+        from app import search_engine
+        
+        queries = []
+        async def handler(request):
+            queries.append(request.url.params["q"])
+            # Hold the response so the other lookups arrive while it is in flight
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, content=orjson.dumps({"products": []}))
+        
+        search_engine.clear_cache()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            results = await asyncio.gather(*(
+                search_engine._fetch_search_results_for_product(term, client)
+                for term in ["pen", "pen ", " PEN", "book"]
+            ))
+        
+        if len(queries) != 2 or results[0] is not results[1] or search_engine._inflight:
+            print(f"❌ Expected 2 requests and no leftover fetches, got {queries}")
+            return False
+        
+        print(f"✅ {len(results)} lookups served by {len(queries)} requests")
+        return True
+    except Exception as e:
+        print(f"❌ Single-flight test error: {e}")
+        return False
+
+def test_pack_messages():
+    """Test that bot replies are packed up to the message limit."""
+    print("\n✉️ Testing bot reply packing...")
+    
+    try:
+        from app.telegram_bot import _pack_messages
+    except ImportError as e:
+        print(f"⚠️ Skipping, bot dependencies not installed: {e}")
+        return True
+    
+    try:
+        # Two texts plus the blank-line separator fill the limit exactly
+        exact = _pack_messages(["a" * 4, "b" * 4], limit=10)
+        if exact != ["aaaa\n\nbbbb"]:
+            print(f"❌ Exact fit not packed: {exact}")
+            return False
+        
+        over = _pack_messages(["a" * 4, "b" * 5], limit=10)
+        if over != ["aaaa", "bbbbb"]:
+            print(f"❌ Overflow not split: {over}")
+            return False
+        
+        # A text longer than the limit goes out on its own, unsplit
+        oversize = _pack_messages(["a", "b" * 20, "c"], limit=10)
+        if oversize != ["a", "b" * 20, "c"]:
+            print(f"❌ Oversize text not passed through: {oversize}")
+            return False
+        
+        print("✅ Replies packed up to the limit")
+        return True
+    except Exception as e:
+        print(f"❌ Reply packing test error: {e}")
+        return False
+
 def test_api_structure():
     """Test API router structure."""
     print("\n🛣️ Testing API structure...")
@@ -122,12 +321,17 @@ def main():
     results.append(test_imports())
     results.append(test_services())
     results.append(test_api_structure())
+    results.append(test_vendor_saturation_cap())
+    results.append(test_pack_messages())
     
     # Run async test
     try:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         results.append(loop.run_until_complete(test_basalam_service()))
+        results.append(loop.run_until_complete(test_malformed_product()))
+        results.append(loop.run_until_complete(test_search_term_dedup()))
+        results.append(loop.run_until_complete(test_search_single_flight()))
         loop.close()
     except Exception as e:
         print(f"❌ Async test error: {e}")
@@ -10,12 +10,99 @@ This script demonstrates:
 
 import asyncio
 import httpx
-import json
+import orjson
 import uuid
-import time
+from operator import itemgetter
 
 BASE_URL = "http://localhost:8000/api/v1"
 
+JSON_HEADERS = {"content-type": "application/json"}
+
+# Fields copied from a search result into a selection request
+_selection_fields = itemgetter('id', 'name', 'vendor_id', 'vendor_name', 'status_id')
+
+
+def selection_payload(product, search_session_id):
+    """Build the POST /selections/products body for a search result."""
+    product_id, product_name, vendor_id, vendor_name, status_id = _selection_fields(product)
+    return {
+        "product_id": product_id,
+        "product_name": product_name,
+        "vendor_id": vendor_id,
+        "vendor_name": vendor_name,
+        "status_id": status_id,
+        "image_url": product['image']['medium'],
+        "search_session_id": search_session_id
+    }
+
+
+# Caps concurrent searches when search_queries is extended for stress runs
+SEARCH_SEMAPHORE = asyncio.Semaphore(8)
+
+# Search results keyed by (q, from, size); a repeated search is answered locally
+SEARCH_CACHE: dict[tuple[str, int, int], list] = {}
+
+
+async def cached_search(client, q, frm, size):
+    """Return (status_code, products) for a search, reusing earlier successful results."""
+    key = (q, frm, size)
+    if key in SEARCH_CACHE:
+        return 200, SEARCH_CACHE[key]
+    
+    async with SEARCH_SEMAPHORE:
+        response = await client.get(
+            f"{BASE_URL}/search/products",
+            params={"q": q, "from": frm, "size": size},
+            timeout=15
+        )
+    if response.status_code != 200:
+        return response.status_code, []
+    
+    products = orjson.loads(response.content).get("products", [])
+    SEARCH_CACHE[key] = products
+    return 200, products
+
+
+async def search_and_select(client, query, search_session_id):
+    """Search for `query` and select its first product under `search_session_id`.
+    
+    Returns the selected product (or None) and the lines to print for this search.
+    """
+    lines = []
+    
+    # Search for products
+    status_code, products = await cached_search(client, query, 0, 5)
+    
+    if status_code != 200:
+        lines.append(f"   ❌ Search failed: {status_code}")
+        return None, lines
+    
+    if not products:
+        lines.append(f"   ⚠️ No products found for '{query}'")
+        return None, lines
+    
+    # Select the first product from this search
+    product = products[0]
+    lines.append(f"   📦 Found {len(products)} products")
+    lines.append(f"   ✅ Selecting: {product['name'][:50]}...")
+    
+    selection_data = selection_payload(product, search_session_id)
+    
+    # Select the product
+    select_response = await client.post(
+        f"{BASE_URL}/selections/products",
+        content=orjson.dumps(selection_data),
+        headers=JSON_HEADERS,
+        timeout=10
+    )
+    
+    if select_response.status_code != 200:
+        lines.append(f"   ❌ Selection failed: {select_response.status_code}")
+        return None, lines
+    
+    lines.append(f"   ✅ Selected successfully!")
+    return orjson.loads(select_response.content), lines
+
 
 async def test_cart_confirmation_flow():
     """Test the complete cart confirmation flow."""
@@ -23,103 +110,64 @@ async def test_cart_confirmation_flow():
     print("🛒 Testing Cart Confirmation Flow")
     print("=" * 50)
     
-    async with httpx.AsyncClient() as client:
+    # Plain-HTTP uvicorn only speaks HTTP/1.1, so concurrency comes from the
+    # keep-alive pool rather than HTTP/2 multiplexing
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=30),
+        timeout=httpx.Timeout(60.0, connect=2.0)
+    ) as client:
         
         # Step 1: Search for different products and select one from each search
         print("📝 Step 1: Searching and selecting products...")
         
         search_queries = ["جامدادی", "کیف", "دفتر"]
-        selected_products = []
+        # One unique search session ID per query
+        session_ids = [uuid.uuid4().hex for _ in search_queries]
         
-        for i, query in enumerate(search_queries, 1):
-            print(f"\n🔍 Search {i}: '{query}'")
-            
-            # Generate a unique search session ID
-            search_session_id = str(uuid.uuid4())
-            
-            # Search for products
-            response = await client.get(
-                f"{BASE_URL}/search/products",
-                params={"q": query, "from": 0, "size": 5},
-                timeout=15
+        # Searches are independent, so run them concurrently and print in query order
+        results = await asyncio.gather(
+            *(
+                search_and_select(client, query, session_id)
+                for query, session_id in zip(search_queries, session_ids)
             )
-            
-            if response.status_code == 200:
-                search_results = response.json()
-                products = search_results.get("products", [])
-                
-                if products:
-                    # Select the first product from this search
-                    product = products[0]
-                    print(f"   📦 Found {len(products)} products")
-                    print(f"   ✅ Selecting: {product['name'][:50]}...")
-                    
-                    selection_data = {
-                        "product_id": product['id'],
-                        "product_name": product['name'],
-                        "vendor_id": product['vendor_id'],
-                        "vendor_name": product['vendor_name'],
-                        "status_id": product['status_id'],
-                        "image_url": product['image']['medium'],
-                        "search_session_id": search_session_id
-                    }
-                    
-                    # Select the product
-                    select_response = await client.post(
-                        f"{BASE_URL}/selections/products",
-                        json=selection_data,
-                        timeout=10
-                    )
-                    
-                    if select_response.status_code == 200:
-                        selected = select_response.json()
-                        selected_products.append(selected)
-                        print(f"   ✅ Selected successfully!")
-                    else:
-                        print(f"   ❌ Selection failed: {select_response.status_code}")
-                else:
-                    print(f"   ⚠️ No products found for '{query}'")
-            else:
-                print(f"   ❌ Search failed: {response.status_code}")
-            
-            # Small delay between searches
-            time.sleep(1)
+        )
+        selected_products = []
+        selected_queries = []
+        for i, (query, (selected, lines)) in enumerate(zip(search_queries, results), 1):
+            print(f"\n🔍 Search {i}: '{query}'")
+            for line in lines:
+                print(line)
+            if selected:
+                selected_products.append(selected)
+                selected_queries.append(query)
         
         # Step 2: Test single selection constraint by trying to select another product from same search
         if selected_products:
             print(f"\n📝 Step 2: Testing single selection per search constraint...")
             
-            # Search again with same session ID
+            # Pick another product from the same search, with the same session ID.
+            # Step 1 already fetched that search, so reuse its second result and
+            # only fetch the next page if there was none.
             first_search_session = selected_products[0].get('search_session_id')
             if first_search_session:
-                response = await client.get(
-                    f"{BASE_URL}/search/products",
-                    params={"q": "جامدادی", "from": 5, "size": 3},
-                    timeout=15
-                )
+                first_query = selected_queries[0]
+                status_code = 200
+                products = SEARCH_CACHE.get((first_query, 0, 5), [])[1:]
+                if not products:
+                    status_code, products = await cached_search(client, first_query, 5, 3)
                 
-                if response.status_code == 200:
-                    search_results = response.json()
-                    products = search_results.get("products", [])
-                    
+                if status_code == 200:
                     if products:
                         # Try to select a different product with same search session
                         product = products[0]
                         print(f"   🔄 Trying to replace selection with: {product['name'][:50]}...")
                         
-                        replacement_data = {
-                            "product_id": product['id'],
-                            "product_name": product['name'],
-                            "vendor_id": product['vendor_id'],
-                            "vendor_name": product['vendor_name'],
-                            "status_id": product['status_id'],
-                            "image_url": product['image']['medium'],
-                            "search_session_id": first_search_session
-                        }
+                        replacement_data = selection_payload(product, first_search_session)
                         
                         replace_response = await client.post(
                             f"{BASE_URL}/selections/products",
-                            json=replacement_data,
+                            content=orjson.dumps(replacement_data),
+                            headers=JSON_HEADERS,
                             timeout=10
                         )
                         
@@ -134,7 +182,7 @@ async def test_cart_confirmation_flow():
         response = await client.get(f"{BASE_URL}/selections/products", timeout=10)
         
         if response.status_code == 200:
-            selections = response.json()
+            selections = orjson.loads(response.content)
             print(f"   📦 Current selections: {selections['total_count']}")
             
             for product in selections['products']:
@@ -154,7 +202,7 @@ async def test_cart_confirmation_flow():
             )
             
             if confirm_response.status_code == 200:
-                result = confirm_response.json()
+                result = orjson.loads(confirm_response.content)
                 
                 print(f"\n🎉 Cart confirmation completed!")
                 print(f"   📊 Total selected products: {result['total_selected_products']}")
@@ -191,7 +239,7 @@ async def test_cart_confirmation_flow():
             else:
                 print(f"   ❌ Cart confirmation failed: {confirm_response.status_code}")
                 try:
-                    error_data = confirm_response.json()
+                    error_data = orjson.loads(confirm_response.content)
                     print(f"   📝 Error: {error_data}")
                 except:
                     print(f"   📝 Response: {confirm_response.text}")
@@ -3,33 +3,44 @@
 Simple test for the specific search endpoint that was failing.
 """
 
-import requests
-import time
-import json
+import asyncio
+import sys
+import httpx
 
-def test_search_endpoint():
+from wait_and_test import wait_until_ready
+
+BASE_URL = "http://localhost:8000"
+
+async def test_search_endpoint():
     """Test the search endpoint with the exact parameters from the error."""
     
     print("🔍 Testing Search Endpoint Fix")
     print("=" * 40)
     
-    # Wait a moment for server to start
-    print("⏳ Waiting for server...")
-    time.sleep(3)
-    
-    url = "http://localhost:8000/api/v1/search/products"
+    async with httpx.AsyncClient(base_url=BASE_URL) as client:
+        # Returns immediately if the server is already up
+        print("⏳ Waiting for server...")
+        if not await wait_until_ready(client):
+            print("❌ Server is not answering on /health")
+            print("   Make sure the server is running!")
+            return False
+        return await _search(client)
+
+async def _search(client):
+    """Run the search request and report the outcome."""
+    url = "/api/v1/search/products"
     params = {
         "q": "آیفون",
         "from": 0,
         "size": 12
     }
     
-    print(f"📡 Testing: {url}")
+    print(f"📡 Testing: {BASE_URL}{url}")
     print(f"📋 Params: {params}")
     print()
     
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = await client.get(url, params=params, timeout=15)
         
         print(f"📊 Status Code: {response.status_code}")
         
@@ -58,7 +69,7 @@ def test_search_endpoint():
                 print(f"📝 Response text: {response.text}")
             return False
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Connection error: {e}")
         print("   Make sure the server is running!")
         return False
@@ -67,7 +78,7 @@ def test_search_endpoint():
         return False
 
 if __name__ == "__main__":
-    success = test_search_endpoint()
+    success = asyncio.run(test_search_endpoint())
     
     if success:
         print("\n" + "="*40)
@@ -78,3 +89,4 @@ if __name__ == "__main__":
         print("\n" + "="*40)
         print("❌ Endpoint still needs fixing")
         print("   Check server logs for details")
+        sys.exit(1)
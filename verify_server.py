@@ -3,122 +3,138 @@
 Simple verification that the server is running and accessible.
 """
 
+import asyncio
+import sys
 import time
-import requests
-import json
-from urllib.parse import urlencode
+import httpx
+from operator import itemgetter
 
-def test_api_endpoints():
+from wait_and_test import wait_until_ready
+
+BASE_URL = "http://localhost:8000"
+
+# Fields copied from a search result into a selection request
+_selection_fields = itemgetter('id', 'name', 'vendor_id', 'vendor_name', 'status_id')
+
+async def test_api_endpoints(client):
     """Test all API endpoints."""
-    base_url = "http://localhost:8000"
-    
     print("🔍 Testing Salamyar API endpoints...")
     print("=" * 50)
     
     try:
-        # Test health endpoint
-        print("1. Testing health endpoint...")
-        response = requests.get(f"{base_url}/health", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"   ✅ Health check passed: {data['status']}")
-            print(f"   📊 Service: {data['service']}")
-            print(f"   🔢 Version: {data['version']}")
-        else:
-            print(f"   ❌ Health check failed: {response.status_code}")
-            return False
-            
-        # Test search endpoint
-        print("\n2. Testing search endpoint...")
-        search_params = {"q": "آیفون", "from": 0, "size": 3}
-        response = requests.get(
-            f"{base_url}/api/v1/search/products",
-            params=search_params,
-            timeout=10
-        )
+        return await _run_checks(client)
+    except httpx.HTTPError as e:
+        print(f"❌ Connection error: {e}")
+        print("   Make sure the server is running on http://localhost:8000")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+
+async def _run_checks(client):
+    """Health and search are independent; the selection steps build on search."""
+    search_params = {"q": "آیفون", "from": 0, "size": 3}
+    response, search_response = await asyncio.gather(
+        client.get("/health", timeout=5),
+        client.get("/api/v1/search/products", params=search_params, timeout=10)
+    )
+    
+    # Test health endpoint
+    print("1. Testing health endpoint...")
+    if response.status_code == 200:
+        data = response.json()
+        print(f"   ✅ Health check passed: {data['status']}")
+        print(f"   📊 Service: {data['service']}")
+        print(f"   🔢 Version: {data['version']}")
+    else:
+        print(f"   ❌ Health check failed: {response.status_code}")
+        return False
         
-        if response.status_code == 200:
-            data = response.json()
-            print(f"   ✅ Search successful!")
-            print(f"   📱 Found {data['meta']['total_count']} total products")
-            print(f"   📄 Showing {len(data['products'])} products")
-            print(f"   ➡️ Has more: {data['meta']['has_more']}")
+    # Test search endpoint
+    print("\n2. Testing search endpoint...")
+    response = search_response
+    
+    if response.status_code == 200:
+        data = response.json()
+        meta = data['meta']
+        products = data['products']
+        print(f"   ✅ Search successful!")
+        print(f"   📱 Found {meta['total_count']} total products")
+        print(f"   📄 Showing {len(products)} products")
+        print(f"   ➡️ Has more: {meta['has_more']}")
+        
+        if products:
+            first_product = products[0]
+            print(f"   🎯 First product: {first_product['name'][:50]}...")
+            print(f"   💰 Price: {first_product['price']:,.0f} تومان")
             
-            if data['products']:
-                first_product = data['products'][0]
-                print(f"   🎯 First product: {first_product['name'][:50]}...")
-                print(f"   💰 Price: {first_product['price']:,.0f} تومان")
-                
-                # Test product selection
-                print("\n3. Testing product selection...")
-                selection_data = {
-                    "product_id": first_product['id'],
-                    "product_name": first_product['name'],
-                    "vendor_id": first_product['vendor_id'],
-                    "vendor_name": first_product['vendor_name'],
-                    "status_id": first_product['status_id'],
-                    "image_url": first_product['image']['medium']
-                }
+            # Test product selection
+            print("\n3. Testing product selection...")
+            product_id, product_name, vendor_id, vendor_name, status_id = _selection_fields(first_product)
+            selection_data = {
+                "product_id": product_id,
+                "product_name": product_name,
+                "vendor_id": vendor_id,
+                "vendor_name": vendor_name,
+                "status_id": status_id,
+                "image_url": first_product['image']['medium']
+            }
+            
+            response = await client.post(
+                "/api/v1/selections/products",
+                json=selection_data,
+                timeout=5
+            )
+            
+            if response.status_code == 200:
+                selected = response.json()
+                print(f"   ✅ Product selected: {selected['product_name'][:30]}...")
                 
-                response = requests.post(
-                    f"{base_url}/api/v1/selections/products",
-                    json=selection_data,
-                    timeout=5
-                )
+                # Test getting selections
+                print("\n4. Testing get selections...")
+                response = await client.get("/api/v1/selections/products", timeout=5)
                 
                 if response.status_code == 200:
-                    selected = response.json()
-                    print(f"   ✅ Product selected: {selected['product_name'][:30]}...")
+                    selections = response.json()
+                    print(f"   ✅ Retrieved {selections['total_count']} selected products")
                     
-                    # Test getting selections
-                    print("\n4. Testing get selections...")
-                    response = requests.get(f"{base_url}/api/v1/selections/products", timeout=5)
+                    # Test removing selection
+                    print("\n5. Testing remove selection...")
+                    response = await client.delete(
+                        f"/api/v1/selections/products/{first_product['id']}",
+                        timeout=5
+                    )
                     
                     if response.status_code == 200:
-                        selections = response.json()
-                        print(f"   ✅ Retrieved {selections['total_count']} selected products")
-                        
-                        # Test removing selection
-                        print("\n5. Testing remove selection...")
-                        response = requests.delete(
-                            f"{base_url}/api/v1/selections/products/{first_product['id']}",
-                            timeout=5
-                        )
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            print(f"   ✅ Product removed: {result['message']}")
-                            return True
-                        else:
-                            print(f"   ❌ Remove failed: {response.status_code}")
+                        result = response.json()
+                        print(f"   ✅ Product removed: {result['message']}")
+                        return True
                     else:
-                        print(f"   ❌ Get selections failed: {response.status_code}")
+                        print(f"   ❌ Remove failed: {response.status_code}")
                 else:
-                    print(f"   ❌ Product selection failed: {response.status_code}")
-        else:
-            print(f"   ❌ Search failed: {response.status_code}")
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Connection error: {e}")
-        print("   Make sure the server is running on http://localhost:8000")
-        return False
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return False
+                    print(f"   ❌ Get selections failed: {response.status_code}")
+            else:
+                print(f"   ❌ Product selection failed: {response.status_code}")
+    else:
+        print(f"   ❌ Search failed: {response.status_code}")
     
     return False
 
-def main():
+async def main():
     """Main function."""
     print("🚀 Salamyar API Live Verification")
     print(f"⏰ Starting at {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    # Wait a moment for server to start
-    print("⏳ Waiting for server to start...")
-    time.sleep(2)
-    
-    success = test_api_endpoints()
+    async with httpx.AsyncClient(base_url=BASE_URL) as client:
+        # Returns immediately if the server is already up
+        print("⏳ Waiting for server to start...")
+        if not await wait_until_ready(client):
+            print("❌ Server is not answering on /health")
+            print("   Check that the server is running: py -m uvicorn app.main:app --reload")
+            return 1
+        
+        success = await test_api_endpoints(client)
     
     print("\n" + "=" * 50)
     if success:
@@ -137,4 +153,4 @@ def main():
     return 0 if success else 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(asyncio.run(main()))
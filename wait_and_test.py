@@ -1,111 +1,203 @@
 #!/usr/bin/env python3
 """
 Wait for server to start and then test it.
+
+Pass --start to launch the server as a subprocess; readiness is then taken
+from its "Application startup complete" log line instead of HTTP polling.
 """
 
-import requests
-import time
+import asyncio
+import sys
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+async def start_server(timeout=20.0):
+    """Launch uvicorn and wait for its startup line.
+    
+    Returns the process, whether the startup line was seen in time, and the
+    task draining its output (the caller must keep it and cancel it on teardown).
+    """
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "app.main:app", "--port", "8000",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
+    
+    async def read_until_ready():
+        while line := await proc.stdout.readline():
+            if b"Application startup complete" in line:
+                return True
+        return False
+    
+    try:
+        ready = await asyncio.wait_for(read_until_ready(), timeout)
+    except asyncio.TimeoutError:
+        ready = False
+    
+    # Keep draining the pipe so the server never blocks on a full buffer
+    drain_task = asyncio.create_task(_drain(proc.stdout))
+    return proc, ready, drain_task
+
+async def _drain(stream):
+    while await stream.readline():
+        pass
 
-def wait_for_server(max_attempts=10):
-    """Wait for server to start."""
+async def wait_until_ready(client, attempts=30):
+    """Poll /health every 100 ms until it returns 200; returns as soon as it does.
+    
+    For an already running server; use wait_for_server when it is still booting.
+    """
+    for _ in range(attempts):
+        try:
+            response = await client.get("/health", timeout=0.2)
+            if response.status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    return False
+
+async def wait_for_server(client, max_wait=20.0):
+    """Wait for server to start.
+    
+    Polls with exponential backoff (50 ms doubling up to 2 s) until the
+    server answers or `max_wait` seconds of sleep have passed.
+    """
     print("⏳ Waiting for server to start...")
     
-    for attempt in range(max_attempts):
+    attempt = 0
+    waited = 0.0
+    while waited < max_wait:
         try:
-            response = requests.get("http://localhost:8000/health", timeout=2)
+            response = await client.get("/health", timeout=2)
             if response.status_code == 200:
                 print(f"✅ Server is running after {attempt + 1} attempts")
                 return True
         except:
             pass
         
-        print(f"   Attempt {attempt + 1}/{max_attempts}...")
-        time.sleep(2)
+        delay = min(2.0, 0.05 * (2 ** attempt))
+        attempt += 1
+        print(f"   Attempt {attempt} failed, retrying in {delay:.2f}s...")
+        await asyncio.sleep(delay)
+        waited += delay
     
     print("❌ Server failed to start after waiting")
     return False
 
-def test_basic_functionality():
+async def test_basic_functionality(client):
     """Test basic API functionality."""
     print("\n🧪 Testing basic functionality...")
     
     try:
-        # Test health
-        response = requests.get("http://localhost:8000/health", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Health: {data['status']}")
-        
-        # Test search
-        print("🔍 Testing search...")
-        response = requests.get(
-            "http://localhost:8000/api/v1/search/products",
+        await _run_checks(client)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+
+async def _run_checks(client):
+    """Health and search are independent; the selection steps build on search."""
+    response, search_response = await asyncio.gather(
+        client.get("/health", timeout=5),
+        client.get(
+            "/api/v1/search/products",
             params={"q": "جامدادی", "from": 0, "size": 2},
             timeout=15
         )
+    )
+    
+    # Test health
+    if response.status_code == 200:
+        data = response.json()
+        print(f"✅ Health: {data['status']}")
+    
+    # Test search
+    print("🔍 Testing search...")
+    response = search_response
+    
+    if response.status_code == 200:
+        data = response.json()
+        print(f"✅ Search: Found {len(data['products'])} products")
         
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Search: Found {len(data['products'])} products")
+        if data['products']:
+            # Test selection
+            print("📦 Testing product selection...")
+            product = data['products'][0]
+            selection_data = {
+                "product_id": product['id'],
+                "product_name": product['name'],
+                "vendor_id": product['vendor_id'],
+                "vendor_name": product['vendor_name'],
+                "status_id": product['status_id'],
+                "image_url": product['image']['medium'],
+                "search_session_id": "test-session"
+            }
             
-            if data['products']:
-                # Test selection
-                print("📦 Testing product selection...")
-                product = data['products'][0]
-                selection_data = {
-                    "product_id": product['id'],
-                    "product_name": product['name'],
-                    "vendor_id": product['vendor_id'],
-                    "vendor_name": product['vendor_name'],
-                    "status_id": product['status_id'],
-                    "image_url": product['image']['medium'],
-                    "search_session_id": "test-session"
-                }
-                
-                response = requests.post(
-                    "http://localhost:8000/api/v1/selections/products",
-                    json=selection_data,
-                    timeout=5
-                )
+            response = await client.post(
+                "/api/v1/selections/products",
+                json=selection_data,
+                timeout=5
+            )
+            
+            if response.status_code == 200:
+                print("✅ Product selection working")
                 
+                # Test get selections
+                response = await client.get("/api/v1/selections/products")
                 if response.status_code == 200:
-                    print("✅ Product selection working")
+                    selections = response.json()
+                    print(f"✅ Get selections: {selections['total_count']} products")
+                    
+                    # Test cart confirmation (might take time)
+                    print("🛒 Testing cart confirmation (this may take a while)...")
+                    response = await client.post(
+                        "/api/v1/selections/confirm",
+                        timeout=45
+                    )
                     
-                    # Test get selections
-                    response = requests.get("http://localhost:8000/api/v1/selections/products")
                     if response.status_code == 200:
-                        selections = response.json()
-                        print(f"✅ Get selections: {selections['total_count']} products")
-                        
-                        # Test cart confirmation (might take time)
-                        print("🛒 Testing cart confirmation (this may take a while)...")
-                        response = requests.post(
-                            "http://localhost:8000/api/v1/selections/confirm",
-                            timeout=45
-                        )
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            print(f"✅ Cart confirmation working!")
-                            print(f"   Selected: {result['total_selected_products']}")
-                            print(f"   Similar found: {result['total_similar_products_found']}")
-                            print(f"   Vendors: {len(result['vendors_with_multiple_matches'])}")
-                        else:
-                            print(f"❌ Cart confirmation failed: {response.status_code}")
+                        result = response.json()
+                        print(f"✅ Cart confirmation working!")
+                        print(f"   Selected: {result['total_selected_products']}")
+                        print(f"   Similar found: {result['total_similar_products_found']}")
+                        print(f"   Vendors: {len(result['vendors_with_multiple_matches'])}")
                     else:
-                        print(f"❌ Get selections failed: {response.status_code}")
+                        print(f"❌ Cart confirmation failed: {response.status_code}")
                 else:
-                    print(f"❌ Product selection failed: {response.status_code}")
-        else:
-            print(f"❌ Search failed: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Test failed: {e}")
+                    print(f"❌ Get selections failed: {response.status_code}")
+            else:
+                print(f"❌ Product selection failed: {response.status_code}")
+    else:
+        print(f"❌ Search failed: {response.status_code}")
+
+async def main():
+    proc = None
+    drain_task = None
+    ready = False
+    if "--start" in sys.argv:
+        print("🚀 Starting server...")
+        proc, ready, drain_task = await start_server()
+    
+    try:
+        # One client for the whole run, so polling and tests share its connections
+        async with httpx.AsyncClient(base_url=BASE_URL) as client:
+            # Fall back to HTTP polling if the startup line was not seen
+            if ready or await wait_for_server(client):
+                await test_basic_functionality(client)
+                print("\n🎉 All tests completed!")
+                print("🌐 API Docs: http://localhost:8000/api/v1/docs")
+            else:
+                print("❌ Could not connect to server")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            await proc.wait()
+        if drain_task is not None:
+            drain_task.cancel()
+            try:
+                await drain_task
+            except asyncio.CancelledError:
+                pass
 
 if __name__ == "__main__":
-    if wait_for_server():
-        test_basic_functionality()
-        print("\n🎉 All tests completed!")
-        print("🌐 API Docs: http://localhost:8000/api/v1/docs")
-    else:
-        print("❌ Could not connect to server")
+    asyncio.run(main())